@@ -1,39 +1,41 @@
 """
 Анализ бизнес-процессов
 """
-from collections import defaultdict
-from typing import Dict, Set, Tuple, List
+from collections import Counter
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Dict, FrozenSet, Set, List, Tuple
 from models import Operation, Choices, ProcessAnalysis, MergePoint, SplitPoint, CriticalPoint, AnalysisData
 
-def analyze_process_patterns(
-    operations: Dict[str, Operation],
+@dataclass
+class _Topology:
+    """Часть анализа, зависящая только от операций (не от порогов Choices)"""
+    external_inputs: Set[str]
+    final_outputs: Set[str]
+    output_to_operation: Dict[str, str]
     input_to_operations: Dict[str, List[str]]
-) -> Tuple[List[MergePoint], List[SplitPoint]]:
-    """
-    Анализирует точки слияния и разветвления в процессах
-    """
-    merge_points = []
-    split_points = []
+    fanout: Dict[str, int]
+    max_output_reuse: Dict[str, int]
+    split_outputs: FrozenSet[str]
+    merge_points: List[MergePoint]
+    split_points: List[SplitPoint]
+    subgroup_counts: Counter
+    group_counts: Counter
+    owner_counts: Counter
 
-    for op_name, op_data in operations.items():
-        # Анализ точек слияния (по входам)
-        if len(op_data.inputs) > 1:
-            merge_points.append(MergePoint(
-                operation=op_name,
-                input_count=len(op_data.inputs),
-                inputs=op_data.inputs
-            ))
-        
-        # Анализ точек разветвления (по ВЫХОДАМ)
-        for output in op_data.outputs:
-            if output in input_to_operations and len(input_to_operations[output]) > 1:
-                split_points.append(SplitPoint(
-                    output=output,
-                    source_operation=op_name,
-                    target_count=len(input_to_operations[output]),
-                    targets=input_to_operations[output]
-                ))
-    return merge_points, split_points
+# Порядок точек для отчетов (по убыванию значимости) задается один раз при анализе
+_MERGE_ORDER = attrgetter('input_count')
+_SPLIT_ORDER = attrgetter('target_count')
+_CRITICAL_ORDER = attrgetter('inputs_count', 'output_reuse')
+
+# Кэш топологии по id(operations). Вместе с топологией хранится сам словарь
+# операций: пока он жив, его id не может достаться другому объекту
+_TOPOLOGY_CACHE: Dict[int, Tuple[Dict[str, Operation], _Topology]] = {}
+_TOPOLOGY_CACHE_SIZE = 4
+
+def clear_topology_cache() -> None:
+    """Сброс кэша топологии (при перезагрузке операций)"""
+    _TOPOLOGY_CACHE.clear()
 
 def analyse_network(
     operations: Dict[str, Operation], choices: Choices
@@ -41,111 +43,184 @@ def analyse_network(
     """
     Основной анализ сети процессов
     """
+    cached = _TOPOLOGY_CACHE.get(id(operations))
+    if cached is not None and cached[0] is operations:
+        topology = cached[1]
+    else:
+        topology = _analyse_topology(operations)
+        if len(_TOPOLOGY_CACHE) >= _TOPOLOGY_CACHE_SIZE:
+            _TOPOLOGY_CACHE.pop(next(iter(_TOPOLOGY_CACHE)))
+        _TOPOLOGY_CACHE[id(operations)] = (operations, topology)
+
+    return _apply_criticality(operations, topology, choices)
+
+def _analyse_topology(operations: Dict[str, Operation]) -> _Topology:
+    """Анализ структуры сети: входы/выходы, mapping, точки слияния и разветвления"""
     all_inputs: Set[str] = set()
     all_outputs: Set[str] = set()
-    subgroup_set: Set[str] = set()
-    group_set: Set[str] = set()
-    owner_set: Set[str] = set()
-
-    for op in operations.values():
-        all_inputs.update(op.inputs)
-        all_outputs.update(op.outputs)
-        # Добавляем только непустые значения
-        if op.subgroup and str(op.subgroup).strip() and str(op.subgroup).strip() != "nan":
-            subgroup_set.add(op.subgroup)
-        if op.group and str(op.group).strip() and str(op.group).strip() != "nan":
-            group_set.add(op.group)
-        if op.owner and str(op.owner).strip() and str(op.owner).strip() != "nan":
-            owner_set.add(op.owner)
-
-    external_inputs = all_inputs - all_outputs
-    final_outputs = all_outputs - all_inputs
-
-    # Создаем mapping от выхода к операции (для первого вхождения)
+    subgroup_counts: Counter = Counter()
+    group_counts: Counter = Counter()
+    owner_counts: Counter = Counter()
+    # Mapping от выхода к операции (для первого вхождения)
     output_to_operation: Dict[str, str] = {}
-    for name, op in operations.items():
-        for output in op.outputs:
-            if output and output not in output_to_operation:
-                output_to_operation[output] = name
+    # Mapping от входа к операциям, которые его используют
+    # (обычный dict: чтение отсутствующего ключа не создает в нем пустых списков)
+    input_to_operations: Dict[str, List[str]] = {}
+    merge_points: List[MergePoint] = []
 
-    # Создаем mapping от входа к операциям, которые его используют
-    input_to_operations: Dict[str, List[str]] = defaultdict(list)
+    # Единый проход: входы/выходы, теги, оба mapping и точки слияния
     for name, op in operations.items():
-        for inp in op.inputs:
+        inputs = op.inputs
+        outputs = op.outputs
+        all_inputs.update(inputs)
+        all_outputs.update(outputs)
+        # Теги уже очищены в Operation, пустые значения ложны
+        if op.subgroup:
+            subgroup_counts[op.subgroup] += 1
+        if op.group:
+            group_counts[op.group] += 1
+        if op.owner:
+            owner_counts[op.owner] += 1
+
+        for output in outputs:
+            if output:
+                output_to_operation.setdefault(output, name)
+
+        for inp in inputs:
             if inp:
-                input_to_operations[inp].append(name)
+                consumers = input_to_operations.get(inp)
+                if consumers is None:
+                    input_to_operations[inp] = [name]
+                else:
+                    consumers.append(name)
+
+        # Анализ точек слияния (по входам)
+        if op.is_merge:
+            merge_points.append(MergePoint(
+                operation=name,
+                input_count=len(inputs),
+                inputs=inputs
+            ))
+
+    # Число операций-потребителей для каждого входа считается один раз
+    fanout: Dict[str, int] = {inp: len(names) for inp, names in input_to_operations.items()}
+
+    # Анализ точек разветвления (по ВЫХОДАМ) требует готового input_to_operations
+    # Заодно для каждой операции запоминается максимальное использование ее выходов
+    split_points: List[SplitPoint] = []
+    max_output_reuse: Dict[str, int] = {}
+    for name, op in operations.items():
+        max_out_cnt = 0
+        for output in op.outputs:
+            target_count = fanout.get(output, 0)
+            if target_count > max_out_cnt:
+                max_out_cnt = target_count
+            if target_count > 1:
+                split_points.append(SplitPoint(
+                    output=output,
+                    source_operation=name,
+                    target_count=target_count,
+                    targets=input_to_operations[output]
+                ))
+        max_output_reuse[name] = max_out_cnt
 
-    merge_points, split_points = analyze_process_patterns(operations, input_to_operations)
+    # Экспортеры выводят точки в этом порядке без повторной сортировки
+    merge_points.sort(key=_MERGE_ORDER, reverse=True)
+    split_points.sort(key=_SPLIT_ORDER, reverse=True)
+
+    return _Topology(
+        external_inputs=all_inputs - all_outputs,
+        final_outputs=all_outputs - all_inputs,
+        output_to_operation=output_to_operation,
+        input_to_operations=input_to_operations,
+        fanout=fanout,
+        max_output_reuse=max_output_reuse,
+        split_outputs=frozenset(inp for inp, count in fanout.items() if count > 1),
+        merge_points=merge_points,
+        split_points=split_points,
+        subgroup_counts=subgroup_counts,
+        group_counts=group_counts,
+        owner_counts=owner_counts
+    )
 
-    # Анализ супер-критических операций
+def _apply_criticality(
+    operations: Dict[str, Operation], topology: _Topology, choices: Choices
+) -> AnalysisData:
+    """Поиск супер-критических операций по порогам Choices и сборка AnalysisData"""
+    max_output_reuse = topology.max_output_reuse
+    min_inputs = choices.critical_min_inputs
+    min_reuse = choices.critical_min_reuse
     critical_points: List[CriticalPoint] = []
-    for op_name, op in operations.items():
-        if not op.outputs:
-            continue
-        
+    for name, op in operations.items():
+        # Дешевая проверка по числу входов выполняется до обращения к выходам
         in_cnt = len(op.inputs)
-        # Считаем максимальное использование среди всех выходов
-        max_out_cnt = max([len(input_to_operations.get(out, [])) for out in op.outputs]) if op.outputs else 0
-        
-        if in_cnt >= choices.critical_min_inputs and max_out_cnt >= choices.critical_min_reuse:
+        if in_cnt < min_inputs or not op.outputs:
+            continue
+
+        # Максимальное использование среди всех выходов посчитано в топологии
+        max_out_cnt = max_output_reuse[name]
+        if max_out_cnt >= min_reuse:
             critical_points.append(
-                CriticalPoint(operation=op_name,
+                CriticalPoint(operation=name,
                              inputs_count=in_cnt,
                              output_reuse=max_out_cnt)
             )
 
+    critical_points.sort(key=_CRITICAL_ORDER, reverse=True)
+
     analysis = ProcessAnalysis(
-        merge_points=merge_points,
-        split_points=split_points,
+        merge_points=topology.merge_points,
+        split_points=topology.split_points,
         critical_points=critical_points,
-        external_inputs=external_inputs,
-        final_outputs=final_outputs,
+        external_inputs=topology.external_inputs,
+        final_outputs=topology.final_outputs,
         operations_count=len(operations),
-        subgroups_count=len(subgroup_set),
-        groups_count=len(group_set),
-        owners_count=len(owner_set)
+        subgroups_count=len(topology.subgroup_counts),
+        groups_count=len(topology.group_counts),
+        owners_count=len(topology.owner_counts),
+        subgroup_counts=topology.subgroup_counts,
+        group_counts=topology.group_counts,
+        owner_counts=topology.owner_counts,
+        complexity_score=_complexity_score(
+            len(operations),
+            len(topology.merge_points),
+            len(topology.split_points),
+            len(critical_points)
+        )
     )
 
     return AnalysisData(
-        external_inputs=external_inputs,
-        final_outputs=final_outputs,
-        output_to_operation=output_to_operation,
-        input_to_operations=input_to_operations,
-        analysis=analysis
+        external_inputs=topology.external_inputs,
+        final_outputs=topology.final_outputs,
+        output_to_operation=topology.output_to_operation,
+        input_to_operations=topology.input_to_operations,
+        analysis=analysis,
+        split_outputs=topology.split_outputs
     )
 
+# Нормализация значений (максимальные ожидаемые значения) и весовые коэффициенты
+# в порядке: операции, точки слияния, точки разветвления, критические точки
+_COMPLEXITY_LIMITS = (50, 10, 10, 5)
+_COMPLEXITY_WEIGHTS = (0.3, 0.2, 0.2, 0.3)
+
+def _complexity_score(*counts: int) -> int:
+    """Оценка сложности от 1 до 10 по числу операций, точек слияния, разветвления и критических точек"""
+    # Общий счет: взвешенная сумма нормализованных показателей
+    total_score = sum(
+        min(count / limit, 1.0) * weight
+        for count, limit, weight in zip(counts, _COMPLEXITY_LIMITS, _COMPLEXITY_WEIGHTS)
+    )
+    
+    return min(10, int(total_score * 10) + 1)
+
 def get_process_complexity_score(operations: Dict[str, Operation], analysis_data: AnalysisData) -> int:
     """
     Рассчитать оценку сложности процесса от 1 до 10
     """
     analysis = analysis_data.analysis
-    
-    # Весовые коэффициенты
-    weights = {
-        'operations': 0.3,
-        'merge_points': 0.2,
-        'split_points': 0.2,
-        'critical_points': 0.3
-    }
-    
-    # Нормализация значений (максимальные ожидаемые значения)
-    max_operations = 50
-    max_merge = 10
-    max_split = 10
-    max_critical = 5
-    
-    # Расчет нормализованных показателей
-    op_score = min(len(operations) / max_operations, 1.0)
-    merge_score = min(len(analysis.merge_points) / max_merge, 1.0)
-    split_score = min(len(analysis.split_points) / max_split, 1.0)
-    critical_score = min(len(analysis.critical_points) / max_critical, 1.0)
-    
-    # Общий счет
-    total_score = (
-        op_score * weights['operations'] +
-        merge_score * weights['merge_points'] +
-        split_score * weights['split_points'] +
-        critical_score * weights['critical_points']
+    return _complexity_score(
+        len(operations),
+        len(analysis.merge_points),
+        len(analysis.split_points),
+        len(analysis.critical_points)
     )
-    
-    return min(10, int(total_score * 10) + 1)
\ No newline at end of file
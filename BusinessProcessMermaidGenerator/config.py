@@ -3,6 +3,9 @@
 """
 from typing import Dict, Any
 
+# Версия приложения (входит в подпись HTML отчетов: новая версия пересобирает старые отчеты)
+APP_VERSION: str = "3.5"
+
 # Стили для визуализации
 STYLES: Dict[str, str] = {
     "external": "fill:yellow,stroke:#333,stroke-width:2px;",
@@ -12,6 +15,12 @@ STYLES: Dict[str, str] = {
     "critical": "fill:#ff4444,stroke:#000,stroke-width:3px,color:white,stroke-dasharray:5 5;",
 }
 
+# Подписи типов узлов в реестрах; индекс: критичность << 2 | слияние << 1 | разветвление
+NODE_TYPE_LABELS: tuple = (
+    "Обычный", "Разветвление", "Слияние", "Слияние+Разветвление",
+    "Супер-критичная", "Супер-критичная", "Супер-критичная", "Супер-критичная",
+)
+
 # Пороговые значения для анализа
 CRITICAL_MIN_INPUTS: int = 3
 CRITICAL_MIN_REUSE: int = 3
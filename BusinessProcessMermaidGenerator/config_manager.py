@@ -4,17 +4,20 @@
 import sys
 import os
 import json
+import logging
 from pathlib import Path
 from typing import Dict, Any, Optional
 from models import Choices
 from config import CRITICAL_MIN_INPUTS, CRITICAL_MIN_REUSE
 
+log = logging.getLogger(__name__)
+
 class ConfigManager:
     def __init__(self, config_file: str = "bp_config.json"):
         # Определяем путь для конфигурации
         if getattr(sys, 'frozen', False):
             # Если программа запущена как exe
-            app_data_path = Path(os.getenv('APPDATA')) / 'BusinessProcessGenerator'
+            app_data_path = Path(os.getenv('APPDATA') or Path.home()) / 'BusinessProcessGenerator'
             app_data_path.mkdir(exist_ok=True)
             self.config_file = app_data_path / config_file
         else:
@@ -33,9 +36,20 @@ class ConfigManager:
             'critical_min_reuse': CRITICAL_MIN_REUSE,
             'no_grouping': True
         }
+        
+        # Кэш конфигурации в памяти: файл перечитывается только при изменении mtime
+        self._mtime = self._file_mtime()
+        self._cached = self._read_config()
     
-    def load_config(self) -> Dict[str, Any]:
-        """Загрузка конфигурации из файла"""
+    def _file_mtime(self) -> Optional[float]:
+        """mtime файла конфигурации или None, если файла нет"""
+        try:
+            return self.config_file.stat().st_mtime
+        except OSError:
+            return None
+    
+    def _read_config(self) -> Dict[str, Any]:
+        """Чтение конфигурации с диска"""
         if self.config_file.exists():
             try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
@@ -43,20 +57,33 @@ class ConfigManager:
                     # Объединяем с конфигурацией по умолчанию
                     config = {**self.default_config, **loaded_config}
                     return config
-            except Exception as e:
-                print(f"Ошибка загрузки конфигурации: {e}")
+            except Exception:
+                log.exception("Ошибка загрузки конфигурации")
         return self.default_config.copy()
     
+    def load_config(self) -> Dict[str, Any]:
+        """Загрузка конфигурации (из кэша, если файл не менялся)"""
+        mtime = self._file_mtime()
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self._cached = self._read_config()
+        return self._cached.copy()
+    
     def save_config(self, config: Dict[str, Any]):
         """Сохранение конфигурации в файл"""
         try:
             # Создаем директорию если нужно
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
+            # Пишем во временный файл и атомарно подменяем: без полузаписанного JSON
+            tmp_file = self.config_file.with_name(self.config_file.name + '.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Ошибка сохранения конфигурации: {e}")
+            os.replace(tmp_file, self.config_file)
+            self._cached = {**self.default_config, **config}
+            self._mtime = self._file_mtime()
+        except Exception:
+            log.exception("Ошибка сохранения конфигурации")
     
     def config_to_choices(self, config: Dict[str, Any]) -> Choices:
         """Преобразование конфигурации в объект Choices"""
@@ -76,4 +103,6 @@ class ConfigManager:
     def reset_config(self):
         """Сброс конфигурации к значениям по умолчанию"""
         if self.config_file.exists():
-            self.config_file.unlink()
\ No newline at end of file
+            self.config_file.unlink()
+        self._mtime = None
+        self._cached = self.default_config.copy()
\ No newline at end of file
@@ -6,15 +6,10 @@ from pathlib import Path
 from typing import Dict, Optional, Tuple, List
 from models import Operation, Choices, AnalysisData, CausalAnalysis
 from data_loader import load_and_validate_data, collect_operations, load_cld_data
-from analysis import analyse_network
+from analysis import analyse_network, clear_topology_cache
 from cld_analyzer import analyze_causal_links_from_operations, analyze_causal_links_from_dataframe
-from exporters import (
-    export_mermaid, 
-    export_html_mermaid, 
-    export_interactive_html,
-    export_cld_mermaid, 
-    export_cld_interactive
-)
+# Экспортеры загружаются лениво: импортируется только модуль выбранного формата
+import exporters
 from config import REQ_COLUMNS
 
 logger = logging.getLogger(__name__)
@@ -35,6 +30,8 @@ class BusinessProcessEngine:
                 return False
             
             self.operations = collect_operations(df, choices)
+            # Топология прежнего набора операций больше не понадобится
+            clear_topology_cache()
             if not self.operations:
                 logger.error("Не найдено операций для анализа")
                 return False
@@ -100,18 +97,18 @@ class BusinessProcessEngine:
                 
                 if choices.output_format == "cld_mermaid":
                     # Основной файл CLD + интерактивная версия
-                    main_file = self._safe_export(export_cld_mermaid, self.causal_analysis, choices, output_base, output_dir)
+                    main_file = self._safe_export(exporters.export_cld_mermaid, self.causal_analysis, choices, output_base, output_dir)
                     if main_file:
                         output_files.append(main_file)
                     
                     # Автоматически создаем интерактивную версию с суффиксом _cld
                     interactive_base = f"{output_base}_cld"
-                    interactive_file = self._safe_export(export_cld_interactive, self.causal_analysis, choices, interactive_base, output_dir)
+                    interactive_file = self._safe_export(exporters.export_cld_interactive, self.causal_analysis, choices, interactive_base, output_dir)
                     if interactive_file:
                         output_files.append(interactive_file)
                     
                 else:  # cld_interactive
-                    interactive_file = self._safe_export(export_cld_interactive, self.causal_analysis, choices, output_base, output_dir)
+                    interactive_file = self._safe_export(exporters.export_cld_interactive, self.causal_analysis, choices, output_base, output_dir)
                     if interactive_file:
                         output_files.append(interactive_file)
                     
@@ -122,30 +119,30 @@ class BusinessProcessEngine:
                 
                 if choices.output_format == "md":
                     # Основной Markdown + интерактивная версия
-                    main_file = self._safe_export(export_mermaid, self.operations, self.analysis_data, choices, available_columns or [], output_base, output_dir)
+                    main_file = self._safe_export(exporters.export_mermaid, self.operations, self.analysis_data, choices, available_columns or [], output_base, output_dir)
                     if main_file:
                         output_files.append(main_file)
                     
                     # Автоматически создаем интерактивную версию с суффиксом _vis
                     interactive_base = f"{output_base}_vis"
-                    interactive_file = self._safe_export(export_interactive_html, self.operations, self.analysis_data, choices, interactive_base, output_dir)
+                    interactive_file = self._safe_export(exporters.export_interactive_html, self.operations, self.analysis_data, choices, interactive_base, output_dir)
                     if interactive_file:
                         output_files.append(interactive_file)
                     
                 elif choices.output_format == "html_mermaid":
                     # Основной HTML + интерактивная версия
-                    main_file = self._safe_export(export_html_mermaid, self.operations, self.analysis_data, choices, available_columns or [], output_base, output_dir)
+                    main_file = self._safe_export(exporters.export_html_mermaid, self.operations, self.analysis_data, choices, available_columns or [], output_base, output_dir)
                     if main_file:
                         output_files.append(main_file)
                     
                     # Автоматически создаем интерактивную версию с суффиксом _vis
                     interactive_base = f"{output_base}_vis"
-                    interactive_file = self._safe_export(export_interactive_html, self.operations, self.analysis_data, choices, interactive_base, output_dir)
+                    interactive_file = self._safe_export(exporters.export_interactive_html, self.operations, self.analysis_data, choices, interactive_base, output_dir)
                     if interactive_file:
                         output_files.append(interactive_file)
                     
                 elif choices.output_format == "html_interactive":
-                    interactive_file = self._safe_export(export_interactive_html, self.operations, self.analysis_data, choices, output_base, output_dir)
+                    interactive_file = self._safe_export(exporters.export_interactive_html, self.operations, self.analysis_data, choices, output_base, output_dir)
                     if interactive_file:
                         output_files.append(interactive_file)
                 else:
@@ -174,7 +171,8 @@ class BusinessProcessEngine:
             "final_outputs": 0,
             "critical_points": 0,
             "merge_points": 0,
-            "split_points": 0
+            "split_points": 0,
+            "complexity_score": 0
         }
         
         if self.analysis_data:
@@ -185,7 +183,8 @@ class BusinessProcessEngine:
                 "final_outputs": len(analysis.final_outputs),
                 "critical_points": len(analysis.critical_points),
                 "merge_points": len(analysis.merge_points),
-                "split_points": len(analysis.split_points)
+                "split_points": len(analysis.split_points),
+                "complexity_score": analysis.complexity_score
             })
         
         if self.causal_analysis:
@@ -1,11 +1,12 @@
 """
 Загрузка и обработка данных с улучшенной валидацией
 """
+import sys
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional
-from collections import defaultdict
-from models import Operation, Choices
-from utils import clean_text, merge_strings
+from models import Operation, Choices, is_blank_tag
+from utils import merge_strings
 
 class DataValidationError(Exception):
     """Ошибка валидации данных"""
@@ -33,12 +34,8 @@ def load_and_validate_data(excel_path: str, sheet_name: str, required_columns: s
     if df.empty:
         raise DataValidationError("Файл Excel не содержит данных")
 
-    # Проверяем наличие хотя бы одной непустой строки
-    has_data = False
-    for _, row in df.iterrows():
-        if pd.notna(row.get("Операция")) or pd.notna(row.get("Выход")):
-            has_data = True
-            break
+    # Проверяем наличие хотя бы одной непустой строки (маски по колонкам вместо обхода строк)
+    has_data = (df["Операция"].notna() | df["Выход"].notna()).any()
     
     if not has_data:
         raise DataValidationError("Файл не содержит данных операций")
@@ -51,45 +48,84 @@ def collect_operations(df: pd.DataFrame, choices: Choices) -> Dict[str, Operatio
     и улучшенной обработкой данных
     """
     operations: Dict[str, Operation] = {}
-    operation_rows: Dict[str, List[dict]] = defaultdict(list)
 
-    # Собираем все строки по имени операции
-    for _, row in df.iterrows():
-        # Пропускаем полностью пустые строки
-        if pd.isna(row.get("Операция")) and pd.isna(row.get("Выход")):
-            continue
+    # Пропускаем полностью пустые строки (одна векторная маска вместо проверки каждой строки)
+    df = df[df["Операция"].notna() | df["Выход"].notna()]
+    if df.empty:
+        return operations
+
+    # Безопасное извлечение имен операций сразу для всей колонки
+    op_names = _extract_operation_names(df["Операция"], len(operations))
+
+    # Строки материализуются один раз, индексы строк группируются по имени операции
+    # Пропуски заменяются на None одной маской: в строках достаточно проверки "is not None"
+    records = df.astype(object).where(df.notna(), None).to_dict("records")
+    operation_rows = pd.Series(op_names).groupby(op_names, sort=False).indices
 
-        # Безопасное извлечение имени операции
-        op_name = _extract_operation_name(row, len(operations))
-        operation_rows[op_name].append(row.to_dict())
+    # Текстовые колонки очищаются сразу целиком, в цикле берется готовое значение по индексу
+    cleaned = {col: _clean_text_column(df[col]) for col in _CLEANED_COLUMNS if col in df.columns}
+
+    # Состав колонок постоянен для всего вызова: проверки наличия выполняются один раз
+    subgroup_column = choices.subgroup_column if choices.subgroup_column in df.columns else None
+    has_metrics = any(col in df.columns for col in _METRIC_COLUMNS)
+    extra_columns = [col for col in df.columns if col not in _STANDARD_COLUMNS]
 
     # Обрабатываем каждую операцию
-    for op_name, rows in operation_rows.items():
-        operation = _merge_operation_data(op_name, rows, df.columns, choices)
+    for op_name, row_indices in operation_rows.items():
+        # Имена интернируются: одинаковые строки в ключах и списках - один объект
+        op_name = sys.intern(op_name)
+        operation = _merge_operation_data(op_name, records, row_indices, cleaned, subgroup_column,
+                                          has_metrics, extra_columns, choices)
         if operation:
             operations[op_name] = operation
-    
+
     return operations
 
-def _extract_operation_name(row: pd.Series, fallback_index: int) -> str:
-    """Безопасное извлечение имени операции"""
-    operation_value = row.get("Операция")
-    
-    if pd.isna(operation_value) or not str(operation_value).strip():
-        return f"Операция_{fallback_index}"
-    
-    return str(operation_value).strip()
+# Колонки, очищаемые векторно перед сборкой операций
+_CLEANED_COLUMNS = ("Группа", "Владелец", "Подробное описание операции")
+
+# Колонки метрик потока создания ценности
+_METRIC_COLUMNS = ("Время операции (мин)", "Количество циклов", "Период цикла",
+                   "Количество персонала", "Стоимость часа работы (руб)")
+
+# Колонки, которые не попадают в additional_data
+_STANDARD_COLUMNS = frozenset(("Операция", "Входы", "Выход") + _CLEANED_COLUMNS + _METRIC_COLUMNS)
+
+def _extract_operation_names(operation_column: pd.Series, fallback_index: int) -> np.ndarray:
+    """Безопасное извлечение имен операций для всей колонки"""
+    names = operation_column.where(operation_column.notna(), "").astype(str).str.strip()
+    names = names.mask(names == "", f"Операция_{fallback_index}")
+    return names.to_numpy()
 
-def _merge_operation_data(op_name: str, rows: List[dict], available_columns: list, choices: Choices) -> Optional[Operation]:
+def _clean_text_column(column: pd.Series) -> np.ndarray:
+    """Векторный аналог clean_text для колонки; пропуски дают пустую строку"""
+    values = column.astype(object).where(column.notna(), "")
+    # Как и clean_text, ложные значения (0, False) считаются пустыми
+    text = values.where(values.astype(bool), "").astype(str)
+    text = text.str.replace("\r", "", regex=False).str.replace("\t", " ", regex=False).str.strip()
+    return text.to_numpy()
+
+def _merge_operation_data(op_name: str, records: List[dict], row_indices: np.ndarray,
+                          cleaned: Dict[str, np.ndarray], subgroup_column: Optional[str],
+                          has_metrics: bool, extra_columns: List[str],
+                          choices: Choices) -> Optional[Operation]:
     """Объединение данных операции из нескольких строк с сохранением всех полей"""
     try:
-        merged_inputs = []
-        merged_outputs = []
-        merged_subgroup = None
-        merged_group = ""
-        merged_owner = ""
+        rows = [records[i] for i in row_indices]
+        group_values = cleaned.get("Группа")
+        owner_values = cleaned.get("Владелец")
+        detailed_values = cleaned.get("Подробное описание операции")
+
+        # dict используется как упорядоченное множество: без дубликатов и с порядком строк
+        merged_inputs: Dict[str, None] = {}
+        merged_outputs: Dict[str, None] = {}
         merged_detailed = ""
         
+        # Теги не агрегируются: берется первое непустое значение, перебор строк прерывается на нем
+        merged_subgroup = _first_subgroup(rows, subgroup_column)
+        merged_group = _first_tag(group_values, row_indices)
+        merged_owner = _first_tag(owner_values, row_indices)
+        
         # НОВЫЕ ПЕРЕМЕННЫЕ ДЛЯ МЕТРИК
         merged_time_minutes = 0.0
         merged_cycle_count = 1
@@ -97,49 +133,43 @@ def _merge_operation_data(op_name: str, rows: List[dict], available_columns: lis
         merged_personnel_count = 1
         merged_personnel_cost_per_hour = 0.0
         
-        for row in rows:
+        for idx, row in zip(row_indices, rows):
             # Объединяем входы
-            merged_inputs.extend(_extract_inputs(row))
+            for inp in _extract_inputs(row):
+                merged_inputs[inp] = None
             
             # Объединяем выходы
-            merged_outputs.extend(_extract_outputs(row))
+            for out in _extract_outputs(row):
+                merged_outputs[out] = None
             
-            # Объединяем метаданные
-            merged_subgroup = _extract_subgroup(row, choices, merged_subgroup)
-            merged_group = _extract_group(row, merged_group)
-            merged_owner = _extract_owner(row, merged_owner)
-            merged_detailed = _extract_detailed(row, merged_detailed)
+            # Объединяем подробное описание
+            if detailed_values is not None:
+                merged_detailed = _extract_detailed(detailed_values[idx], merged_detailed)
             
             # НОВОЕ: Извлекаем метрики потока создания ценности
-            merged_time_minutes = _extract_time_minutes(row, merged_time_minutes)
-            merged_cycle_count = _extract_cycle_count(row, merged_cycle_count)
-            merged_cycle_period = _extract_cycle_period(row, merged_cycle_period)
-            merged_personnel_count = _extract_personnel_count(row, merged_personnel_count)
-            merged_personnel_cost_per_hour = _extract_personnel_cost(row, merged_personnel_cost_per_hour)
-        
-        # Убираем дубликаты и пустые значения
-        merged_inputs = list(set(filter(None, merged_inputs)))
-        merged_outputs = list(set(filter(None, merged_outputs)))
+            if has_metrics:
+                merged_time_minutes = _extract_time_minutes(row, merged_time_minutes)
+                merged_cycle_count = _extract_cycle_count(row, merged_cycle_count)
+                merged_cycle_period = _extract_cycle_period(row, merged_cycle_period)
+                merged_personnel_count = _extract_personnel_count(row, merged_personnel_count)
+                merged_personnel_cost_per_hour = _extract_personnel_cost(row, merged_personnel_cost_per_hour)
         
         # Формируем текст узла
         node_text = _build_node_text(op_name, merged_detailed, choices)
         
         additional_data = {}
-        for col in available_columns:
-            if col not in ['Операция', 'Входы', 'Выход', 'Группа', 'Владелец', 'Подробное описание операции',
-                          'Время операции (мин)', 'Количество циклов', 'Период цикла', 
-                          'Количество персонала', 'Стоимость часа работы (руб)']:
-                values = []
-                for row in rows:
-                    if col in row and pd.notna(row[col]) and str(row[col]).strip():
-                        values.append(str(row[col]).strip())
-                if values:
-                    additional_data[col] = '; '.join(set(values))
+        for col in extra_columns:
+            values = []
+            for row in rows:
+                if row.get(col) is not None and str(row[col]).strip():
+                    values.append(str(row[col]).strip())
+            if values:
+                additional_data[col] = '; '.join(set(values))
         
         operation = Operation(
             name=op_name,
-            outputs=merged_outputs,
-            inputs=merged_inputs,
+            outputs=list(merged_outputs),
+            inputs=list(merged_inputs),
             subgroup=merged_subgroup,
             node_text=node_text,
             group=merged_group,
@@ -150,12 +180,10 @@ def _merge_operation_data(op_name: str, rows: List[dict], available_columns: lis
             cycle_count=merged_cycle_count,
             cycle_period=merged_cycle_period,
             personnel_count=merged_personnel_count,
-            personnel_cost_per_hour=merged_personnel_cost_per_hour
+            personnel_cost_per_hour=merged_personnel_cost_per_hour,
+            additional_data=additional_data
         )
         
-        # Добавляем дополнительные данные
-        operation.additional_data = additional_data
-        
         return operation
         
     except Exception as e:
@@ -165,59 +193,45 @@ def _merge_operation_data(op_name: str, rows: List[dict], available_columns: lis
 def _extract_inputs(row: dict) -> List[str]:
     """Извлечение входов из строки"""
     inputs = []
-    if pd.notna(row.get("Входы")):
+    if row.get("Входы") is not None:
         input_text = str(row["Входы"])
         if input_text.strip() and input_text.strip() != "—":
-            new_inputs = [inp.strip() for inp in input_text.split(";") if inp.strip()]
+            new_inputs = [sys.intern(inp.strip()) for inp in input_text.split(";") if inp.strip()]
             inputs.extend(new_inputs)
     return inputs
 
 def _extract_outputs(row: dict) -> List[str]:
     """Извлечение выходов из строки"""
     outputs = []
-    if pd.notna(row.get("Выход")):
+    if row.get("Выход") is not None:
         output_text = str(row["Выход"]).strip()
         if output_text and output_text != "—":
-            new_outputs = [out.strip() for out in output_text.split(";") if out.strip()]
+            new_outputs = [sys.intern(out.strip()) for out in output_text.split(";") if out.strip()]
             outputs.extend(new_outputs)
     return outputs
 
-def _extract_subgroup(row: dict, choices: Choices, current_value: str) -> str:
-    """Извлечение подгруппы"""
-    if not current_value and choices.subgroup_column and pd.notna(row.get(choices.subgroup_column)):
-        subgroup_value = str(row[choices.subgroup_column]).strip()
-        if subgroup_value and subgroup_value != "—" and subgroup_value != "nan":
-            return subgroup_value
-    return current_value
+def _first_subgroup(rows: List[dict], column: Optional[str]) -> Optional[str]:
+    """Первая непустая подгруппа среди строк операции"""
+    if not column:
+        return None
+    values = (str(row[column]).strip() for row in rows if row.get(column) is not None)
+    return next((value for value in values if not is_blank_tag(value)), None)
 
-def _extract_group(row: dict, current_value: str) -> str:
-    """Извлечение группы"""
-    if not current_value and "Группа" in row and pd.notna(row.get("Группа")):
-        group_value = clean_text(row.get("Группа"))
-        if group_value and group_value != "—" and group_value != "nan":
-            return group_value
-    return current_value
+def _first_tag(values: Optional[np.ndarray], row_indices: np.ndarray) -> str:
+    """Первое непустое значение очищенной колонки (группа, владелец) среди строк операции"""
+    if values is None:
+        return ""
+    return next((value for value in values[row_indices] if not is_blank_tag(value)), "")
 
-def _extract_owner(row: dict, current_value: str) -> str:
-    """Извлечение владельца"""
-    if not current_value and "Владелец" in row and pd.notna(row.get("Владелец")):
-        owner_value = clean_text(row.get("Владелец"))
-        if owner_value and owner_value != "—" and owner_value != "nan":
-            return owner_value
-    return current_value
-
-def _extract_detailed(row: dict, current_value: str) -> str:
-    """Извлечение подробного описания"""
-    if "Подробное описание операции" in row and pd.notna(row.get("Подробное описание операции")):
-        new_detailed = clean_text(row.get("Подробное описание операции"))
-        return merge_strings(current_value, new_detailed, "; ")
-    return current_value
+def _extract_detailed(new_detailed: str, current_value: str) -> str:
+    """Извлечение подробного описания (значение уже очищено)"""
+    return merge_strings(current_value, new_detailed, "; ")
 
 # НОВЫЕ ФУНКЦИИ ДЛЯ ИЗВЛЕЧЕНИЯ МЕТРИК
 
 def _extract_time_minutes(row: dict, current_value: float) -> float:
     """Извлечение времени операции в минутах"""
-    if "Время операции (мин)" in row and pd.notna(row.get("Время операции (мин)")):
+    if row.get("Время операции (мин)") is not None:
         try:
             time_value = float(row["Время операции (мин)"])
             return max(time_value, current_value)  # Берем максимальное значение
@@ -227,7 +241,7 @@ def _extract_time_minutes(row: dict, current_value: float) -> float:
 
 def _extract_cycle_count(row: dict, current_value: int) -> int:
     """Извлечение количества циклов"""
-    if "Количество циклов" in row and pd.notna(row.get("Количество циклов")):
+    if row.get("Количество циклов") is not None:
         try:
             count_value = int(row["Количество циклов"])
             return max(count_value, current_value)
@@ -238,7 +252,7 @@ def _extract_cycle_count(row: dict, current_value: int) -> int:
 def _extract_cycle_period(row: dict, current_value: str) -> str:
     """Извлечение периода цикла"""
     valid_periods = ["смена", "день", "неделя", "месяц", "квартал", "год"]
-    if "Период цикла" in row and pd.notna(row.get("Период цикла")):
+    if row.get("Период цикла") is not None:
         period_value = str(row["Период цикла"]).strip().lower()
         if period_value in valid_periods:
             return period_value
@@ -246,7 +260,7 @@ def _extract_cycle_period(row: dict, current_value: str) -> str:
 
 def _extract_personnel_count(row: dict, current_value: int) -> int:
     """Извлечение количества персонала"""
-    if "Количество персонала" in row and pd.notna(row.get("Количество персонала")):
+    if row.get("Количество персонала") is not None:
         try:
             count_value = int(row["Количество персонала"])
             return max(count_value, current_value)
@@ -256,7 +270,7 @@ def _extract_personnel_count(row: dict, current_value: int) -> int:
 
 def _extract_personnel_cost(row: dict, current_value: float) -> float:
     """Извлечение стоимости часа работы"""
-    if "Стоимость часа работы (руб)" in row and pd.notna(row.get("Стоимость часа работы (руб)")):
+    if row.get("Стоимость часа работы (руб)") is not None:
         try:
             cost_value = float(row["Стоимость часа работы (руб)"])
             return max(cost_value, current_value)
@@ -1,27 +1,61 @@
 """
 Модули экспорта для генератора диаграмм бизнес-процессов
+
+Экспортеры загружаются лениво (PEP 562): модуль импортируется
+при первом обращении к его функции
 """
 
-from .mermaid_exporter import export_mermaid, build_mermaid_md, build_mermaid_html
-from .html_exporter import export_html_mermaid
-from .interactive_exporter import export_interactive_html
-from .cld_mermaid_exporter import export_cld_mermaid
-from .cld_interactive_exporter import export_cld_interactive
-from .excel_exporter import (export_operations_registry, 
-                           export_io_registry, 
-                           export_cld_registry,
-                           export_complete_registry)
-
-__all__ = [
-    'export_mermaid',
-    'build_mermaid_md', 
-    'build_mermaid_html',
-    'export_html_mermaid',
-    'export_interactive_html',
-    'export_cld_mermaid',
-    'export_cld_interactive',
-    'export_operations_registry',
-    'export_io_registry', 
-    'export_cld_registry',
-    'export_complete_registry'
-]
\ No newline at end of file
+# Загрузчики модулей пакета. Импорты записаны явно, а не строкой:
+# сборщик exe (PyInstaller) находит модули только по таким импортам
+def _mermaid_exporter():
+    from . import mermaid_exporter
+    return mermaid_exporter
+
+def _html_exporter():
+    from . import html_exporter
+    return html_exporter
+
+def _interactive_exporter():
+    from . import interactive_exporter
+    return interactive_exporter
+
+def _cld_mermaid_exporter():
+    from . import cld_mermaid_exporter
+    return cld_mermaid_exporter
+
+def _cld_interactive_exporter():
+    from . import cld_interactive_exporter
+    return cld_interactive_exporter
+
+def _excel_exporter():
+    from . import excel_exporter
+    return excel_exporter
+
+# Имя функции -> загрузчик модуля пакета, в котором она определена
+_LAZY = {
+    'export_mermaid': _mermaid_exporter,
+    'build_mermaid_md': _mermaid_exporter,
+    'build_mermaid_html': _mermaid_exporter,
+    'export_html_mermaid': _html_exporter,
+    'export_interactive_html': _interactive_exporter,
+    'export_cld_mermaid': _cld_mermaid_exporter,
+    'export_cld_interactive': _cld_interactive_exporter,
+    'export_operations_registry': _excel_exporter,
+    'export_io_registry': _excel_exporter,
+    'export_cld_registry': _excel_exporter,
+    'export_complete_registry': _excel_exporter,
+}
+
+__all__ = list(_LAZY)
+
+def __getattr__(name):
+    loader = _LAZY.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(loader(), name)
+    # Последующие обращения не проходят через __getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -729,7 +729,7 @@ def export_cld_interactive(causal_analysis: CausalAnalysis, choices: Choices,
         json.dumps(html_data, ensure_ascii=False, indent=2)
     )
     
-    output_file.write_text(html_content, encoding=ENCODING)
+    output_file.write_bytes(html_content.encode(ENCODING))
     
     print(f"\n" + "="*60)
     print("✓ ИНТЕРАКТИВНЫЙ CAUSAL LOOP DIAGRAM УСПЕШНО СОЗДАН!")
@@ -132,7 +132,7 @@ def export_cld_mermaid(causal_analysis: CausalAnalysis, choices: Choices,
     ])
     
     # Сохранение файла
-    output_file.write_text("".join(content_parts), encoding=ENCODING)
+    output_file.write_bytes("".join(content_parts).encode(ENCODING))
     
     print(f"\n" + "="*60)
     print("✓ CAUSAL LOOP DIAGRAM УСПЕШНО СОЗДАН!")
@@ -50,7 +50,7 @@ def export_operations_registry(operations: Dict[str, Operation],
             row['Стоимость часа работы (руб)'] = op.personnel_cost_per_hour
         
         # Сохраняем ВСЕ дополнительные поля из исходных данных
-        if hasattr(op, 'additional_data') and op.additional_data:
+        if op.additional_data:
             for key, value in op.additional_data.items():
                 # Избегаем дублирования стандартных полей
                 if key not in ['Операция', 'Входы', 'Выход', 'Группа', 'Владелец', 'Подробное описание операции', 'Подгруппа',
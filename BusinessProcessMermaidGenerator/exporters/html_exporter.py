@@ -1,161 +1,111 @@
 """
 Экспорт в HTML с минималистичной визуализацией Mermaid диаграмм
 """
+import hashlib
 import json
+import os
+from functools import lru_cache
+from html import escape as html_escape
+from itertools import chain, compress, cycle
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List
-from models import Operation, Choices, AnalysisData
-from utils import safe_id, escape_text, clean_text
-from config import ENCODING
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from models import Operation, Choices, AnalysisData, CriticalPoint
+from utils import safe_id, escape_text, clean_text, casefold_key
+from config import ENCODING, STYLES, NODE_TYPE_LABELS, APP_VERSION
 
-def create_simple_table(headers: List[str], data: List[Dict[str, str]]) -> str:
-    """
-    Создает минималистичную HTML таблицу
-    """
+# Разметка таблиц: стили ячеек постоянны и собираются один раз при импорте
+_TABLE_OPEN = '<table style="width: 100%; border-collapse: collapse; margin: 15px 0; font-size: 14px;">'
+_TH_TMPL = '<th style="border: 1px solid #ddd; padding: 8px; text-align: left; background: #f9f9f9;">{}</th>'
+_TD_OPEN = '<td style="border: 1px solid #ddd; padding: 8px;">'
+_TD_CLOSE = '</td>'
+_TD_SEP = _TD_CLOSE + '\n' + _TD_OPEN
+# Перевод строки перед каждой строкой таблицы входит в сам шаблон, фрагменты склеиваются без разделителя
+_ROW_OPEN = ('\n<tr style="background: #f9f9f9;">\n' + _TD_OPEN, '\n<tr style="background: #fff;">\n' + _TD_OPEN)
+_ROW_CLOSE = _TD_CLOSE + '\n</tr>'
+# Экранирование текста ячеек за один проход: спецсимволы HTML и перевод строк в <br>
+_HTML_TRANS = str.maketrans({'\n': '<br>', '<': '&lt;', '>': '&gt;', '&': '&amp;', '"': '&quot;'})
+
+@lru_cache(maxsize=16)
+def _table_templates(headers: Tuple[str, ...]) -> Tuple[str, Tuple[str, str]]:
+    """Шапка таблицы и шаблоны строк (для четных и нечетных строк) для набора колонок"""
+    header_html = '\n'.join(
+        [_TABLE_OPEN, '<thead><tr>'] + [_TH_TMPL.format(header) for header in headers] + ['</tr></thead>', '<tbody>']
+    )
+    cells_tmpl = _TD_SEP.join(["{}"] * len(headers)) + _ROW_CLOSE
+    return header_html, (_ROW_OPEN[0] + cells_tmpl, _ROW_OPEN[1] + cells_tmpl)
+
+def _format_row(row: Sequence[str], row_tmpl: str) -> str:
+    """HTML строка таблицы по шаблону: значения идут в порядке колонок"""
+    return row_tmpl.format(*[str(value).translate(_HTML_TRANS) for value in row])
+
+def _table_parts(headers: List[str], data: List[Sequence[str]]) -> List[str]:
+    """Фрагменты HTML таблицы в заранее выделенном списке: шапка, строки и конец таблицы"""
     if not data:
-        return "<p>Нет данных для отображения</p>"
-    
-    html = ['<table style="width: 100%; border-collapse: collapse; margin: 15px 0; font-size: 14px;">']
-    html.append('<thead><tr>')
-    for header in headers:
-        html.append(f'<th style="border: 1px solid #ddd; padding: 8px; text-align: left; background: #f9f9f9;">{header}</th>')
-    html.append('</tr></thead>')
-    html.append('<tbody>')
-    for i, row in enumerate(data):
-        bg_color = '#f9f9f9' if i % 2 == 0 else '#fff'
-        html.append(f'<tr style="background: {bg_color};">')
-        for header in headers:
-            value = str(row.get(header, ""))
-            value = value.replace('\n', '<br>')
-            html.append(f'<td style="border: 1px solid #ddd; padding: 8px;">{value}</td>')
-        html.append('</tr>')
-    html.append('</tbody></table>')
-    return '\n'.join(html)
+        return ["<p>Нет данных для отображения</p>"]
 
-def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData, operations: Dict[str, Operation], 
-                               choices: Choices, available_columns: List[str], output_file: Path, output_base: str) -> None:
+    header_html, row_tmpls = _table_templates(tuple(headers))
+    # Размер известен заранее: шапка, строки и конец таблицы
+    end = len(data) + 1
+    html = [header_html] * (end + 1)
+    # Строки форматируются через map: чередование фона задает cycle по шаблонам
+    html[1:end] = map(_format_row, data, cycle(row_tmpls))
+    html[end] = '\n</tbody></table>'
+    return html
+
+def create_simple_table(headers: List[str], data: List[Sequence[str]]) -> str:
     """
-    Генерирует минималистичный HTML отчет с акцентом на диаграмму
+    Создает минималистичную HTML таблицу
     """
-    analysis = analysis_data.analysis
-    
-    # Подготовка данных для таблиц
-    from collections import defaultdict
-    input_to_operations = defaultdict(list)
-    for op in operations.values():
-        for inp in op.inputs:
-            if inp:
-                input_to_operations[inp].append(op.name)
-    
-    # Реестр операций
-    op_rows = []
-    critical_ops = {c.operation for c in analysis.critical_points}
-    
-    for name, op in operations.items():
-        is_merge = len(op.inputs) > 1
-        is_split = any(len(input_to_operations.get(out, [])) > 1 for out in op.outputs)
-        node_type = (
-            "Супер-критичная" if name in critical_ops else
-            "Слияние+Разветвление" if is_merge and is_split else
-            "Слияние" if is_merge else
-            "Разветвление" if is_split else
-            "Обычный"
-        )
-        
-        row_data = {
-            "Операция": name,
-            "Входы": ", ".join(op.inputs) if op.inputs else "-",
-            "Выходы": ", ".join(op.outputs) if op.outputs else "-",
-            "Тип узла": node_type,
-        }
-        
-        if 'Группа' in available_columns and op.group:
-            row_data["Группа"] = op.group
-        if 'Владелец' in available_columns and op.owner:
-            row_data["Владелец"] = op.owner
-        if 'Подробное описание операции' in available_columns and op.detailed:
-            row_data["Описание"] = op.detailed
-            
-        op_rows.append(row_data)
-    
-    # Реестр входов/выходов
-    io_rows = []
-    items = analysis.external_inputs | analysis.final_outputs | set(analysis_data.output_to_operation) | set(input_to_operations)
-    for item in sorted(items):
-        if not item:
-            continue
-        src = "ВНЕШНИЙ ВХОД" if item in analysis.external_inputs else analysis_data.output_to_operation.get(item, "-")
-        tgts = input_to_operations.get(item, [])
-        if item in analysis.final_outputs and not tgts:
-            tgts = ["КОНЕЧНЫЙ ВЫХОД"]
-        io_rows.append({
-            "Элемент": item,
-            "Источник": src,
-            "Потребители": ", ".join(tgts) if tgts else "-",
-        })
-
-    # Определение доступных колонок
-    available_cols = {
-        'group': 'Группа' in available_columns,
-        'owner': 'Владелец' in available_columns,
-        'detailed_desc': 'Подробное описание операции' in available_columns
-    }
-
-    # Генерация HTML для критических операций
-    critical_ops_html = ""
-    if analysis.critical_points:
-        critical_items = []
-        for cp in sorted(analysis.critical_points, key=lambda x: (x.inputs_count, x.output_reuse), reverse=True):
-            critical_items.append(f'''
-                <div class="critical-item">
-                    <strong>{cp.operation}</strong><br>
-                    {cp.inputs_count} входов, выход используется в {cp.output_reuse} операциях
-                </div>
-            ''')
-        critical_ops_html = f'''
-            <div class="section">
-                <h2 class="section-header">Критические операции</h2>
-                {''.join(critical_items)}
-            </div>
-        '''
+    return ''.join(_table_parts(headers, data))
+
+def _minify_static(text: str) -> str:
+    """Простейшая минификация статической разметки: без отступов, пустых строк и //-комментариев"""
+    lines = (line.strip() for line in text.splitlines())
+    minified = "\n".join(line for line in lines if line and not line.startswith("//"))
+    return minified + "\n" if text.endswith("\n") else minified
 
-    html_content = f'''<!DOCTYPE html>
+# Статическая часть страницы до кода диаграммы собирается из трех блоков: DOCTYPE, CSS, панель управления
+_HTML_DOCTYPE = _minify_static('''<!DOCTYPE html>
 <html lang="ru">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Диаграмма бизнес-процесса</title>
-    <script src="https://cdn.jsdelivr.net/npm/mermaid@11.0.1/dist/mermaid.min.js"></script>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>
-    <style>
-        * {{
+    <script defer src="https://cdn.jsdelivr.net/npm/mermaid@11.0.1/dist/mermaid.min.js"></script>
+    <script defer src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>
+''')
+
+# Стили страницы: обычная строка без удвоения фигурных скобок
+_STATIC_CSS = _minify_static('''    <style>
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             line-height: 1.5;
             color: #333;
             background: #fff;
             padding: 0;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 100%;
             margin: 0;
             padding: 0;
-        }}
+        }
         
         /* Секция диаграммы - ПЕРВАЯ И ГЛАВНАЯ */
-        .diagram-section {{
+        .diagram-section {
             background: #fff;
             border-bottom: 1px solid #e1e5e9;
             margin: 0;
-        }}
+        }
         
-        .diagram-header {{
+        .diagram-header {
             background: #f8f9fa;
             padding: 12px 20px;
             border-bottom: 1px solid #e1e5e9;
@@ -164,16 +114,16 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
             align-items: center;
             flex-wrap: wrap;
             gap: 10px;
-        }}
+        }
         
-        .diagram-controls {{
+        .diagram-controls {
             display: flex;
             gap: 8px;
             align-items: center;
             flex-wrap: wrap;
-        }}
+        }
         
-        .control-btn {{
+        .control-btn {
             background: #6c757d;
             color: white;
             border: none;
@@ -182,29 +132,29 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
             cursor: pointer;
             font-size: 13px;
             transition: background 0.2s;
-        }}
+        }
         
-        .control-btn:hover {{
+        .control-btn:hover {
             background: #5a6268;
-        }}
+        }
         
-        .download-btn {{
+        .download-btn {
             background: #28a745;
-        }}
+        }
         
-        .download-btn:hover {{
+        .download-btn:hover {
             background: #218838;
-        }}
+        }
         
-        .interactive-btn {{
+        .interactive-btn {
             background: #007bff;
-        }}
+        }
         
-        .interactive-btn:hover {{
+        .interactive-btn:hover {
             background: #0056b3;
-        }}
+        }
         
-        .zoom-info {{
+        .zoom-info {
             background: #fff;
             padding: 4px 8px;
             border-radius: 3px;
@@ -212,126 +162,129 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
             min-width: 60px;
             text-align: center;
             border: 1px solid #ddd;
-        }}
+        }
         
-        .diagram-container {{
+        .diagram-container {
             width: 100%;
             height: 75vh;
             min-height: 500px;
             overflow: auto;
             background: #fafafa;
             cursor: grab;
-        }}
+        }
         
-        .diagram-container.dragging {{
+        .diagram-container.dragging {
             cursor: grabbing;
-        }}
+        }
         
-        #mermaid-diagram {{
+        #mermaid-diagram {
             padding: 30px;
             display: flex;
             justify-content: center;
             align-items: flex-start;
             min-height: 100%;
-        }}
+        }
         
         /* Минималистичные стили Mermaid */
-        .mermaid {{
+        .mermaid {
             text-align: center;
-        }}
+        }
         
-        .mermaid .node rect {{
+        .mermaid .node rect {
             stroke-width: 1.5px;
             rx: 4px;
             ry: 4px;
-        }}
+        }
         
         /* Секции с таблицами - ПОСЛЕ ДИАГРАММЫ */
-        .content-section {{
+        .content-section {
             max-width: 1400px;
             margin: 0 auto;
             padding: 30px 20px;
-        }}
+        }
         
-        .section {{
+        .section {
             margin: 0 0 30px 0;
             background: #fff;
-        }}
+            /* Большие таблицы ниже экрана не отрисовываются, пока до них не дошла прокрутка */
+            content-visibility: auto;
+            contain-intrinsic-size: auto 600px;
+        }
         
-        .section-header {{
+        .section-header {
             font-size: 1.4em;
             font-weight: 600;
             margin: 0 0 15px 0;
             padding: 0 0 10px 0;
             border-bottom: 2px solid #e1e5e9;
             color: #2c3e50;
-        }}
+        }
         
-        .stats-grid {{
+        .stats-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 15px;
             margin: 20px 0;
-        }}
+        }
         
-        .stat-item {{
+        .stat-item {
             background: #f8f9fa;
             padding: 15px;
             border-radius: 6px;
             border-left: 4px solid #3498db;
-        }}
+        }
         
-        .stat-value {{
+        .stat-value {
             font-size: 1.8em;
             font-weight: bold;
             color: #2c3e50;
             display: block;
-        }}
+        }
         
-        .stat-label {{
+        .stat-label {
             font-size: 0.9em;
             color: #6c757d;
             margin-top: 5px;
-        }}
+        }
         
-        .nav-hint {{
+        .nav-hint {
             font-size: 0.8em;
             color: #6c757d;
             text-align: center;
             padding: 10px;
             background: #f8f9fa;
             border-top: 1px solid #e1e5e9;
-        }}
+        }
         
-        .critical-item {{
+        .critical-item {
             background: #fff3cd;
             border: 1px solid #ffeaa7;
             padding: 10px;
             margin: 8px 0;
             border-radius: 4px;
             font-size: 0.9em;
-        }}
+        }
         
-        .interactive-promo {{
+        .interactive-promo {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 20px;
             border-radius: 10px;
             margin: 20px 0;
             text-align: center;
-        }}
+        }
         
-        .interactive-promo h3 {{
+        .interactive-promo h3 {
             margin: 0 0 10px 0;
             font-size: 1.3em;
-        }}
+        }
         
-        .interactive-promo p {{
+        .interactive-promo p {
             margin: 0 0 15px 0;
             opacity: 0.9;
-        }}
+        }
         
-        .promo-btn {{
+        .promo-btn {
             background: rgba(255, 255, 255, 0.2);
             color: white;
             border: 2px solid white;
@@ -342,136 +295,69 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
             transition: all 0.3s ease;
             text-decoration: none;
             display: inline-block;
-        }}
+        }
         
-        .promo-btn:hover {{
+        .promo-btn:hover {
             background: white;
             color: #667eea;
             transform: translateY(-2px);
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            .diagram-controls {{
+        @media (max-width: 768px) {
+            .diagram-controls {
                 justify-content: center;
-            }}
+            }
             
-            .diagram-container {{
+            .diagram-container {
                 height: 60vh;
                 padding: 15px;
-            }}
+            }
             
-            .stats-grid {{
+            .stats-grid {
                 grid-template-columns: 1fr;
-            }}
+            }
             
-            .content-section {{
+            .content-section {
                 padding: 20px 15px;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
-<body>
+''')
+
+# Начало тела документа: заголовок и кнопки управления диаграммой
+_HTML_DIAGRAM_OPEN = _minify_static('''<body>
     <div class="container">
         <!-- ДИАГРАММА - ПЕРВАЯ И ГЛАВНАЯ -->
         <div class="diagram-section">
             <div class="diagram-header">
                 <div style="font-weight: 600; color: #2c3e50;">Диаграмма бизнес-процесса</div>
                 <div class="diagram-controls">
-                    <button class="control-btn" onclick="zoomOut()" title="Уменьшить">−</button>
+                    <button class="control-btn" data-action="zoomOut" title="Уменьшить">−</button>
                     <div class="zoom-info" id="zoomInfo">100%</div>
-                    <button class="control-btn" onclick="zoomIn()" title="Увеличить">+</button>
-                    <button class="control-btn" onclick="resetView()" title="Сбросить вид">Сброс</button>
-                    <button class="control-btn" onclick="fitToScreen()" title="Вместить в экран">Вместить</button>
-                    <button class="control-btn interactive-btn" onclick="openInteractive()" title="Открыть интерактивную версию">🎮 Интерактивная</button>
-                    <button class="control-btn download-btn" onclick="downloadPNG()" title="Скачать PNG">PNG</button>
+                    <button class="control-btn" data-action="zoomIn" title="Увеличить">+</button>
+                    <button class="control-btn" data-action="resetView" title="Сбросить вид">Сброс</button>
+                    <button class="control-btn" data-action="fitToScreen" title="Вместить в экран">Вместить</button>
+                    <button class="control-btn interactive-btn" data-action="openInteractive" title="Открыть интерактивную версию">🎮 Интерактивная</button>
+                    <button class="control-btn download-btn" data-action="downloadPNG" title="Скачать PNG">PNG</button>
                 </div>
             </div>
             <div class="diagram-container" id="diagramContainer">
                 <div class="mermaid" id="mermaid-diagram">
-{mermaid_code}
-                </div>
-            </div>
-            <div class="nav-hint">
-                Колесо мыши - масштаб • ЛКМ + перетаскивание - навигация • Ctrl+колесо - точный масштаб
-            </div>
-        </div>
+''')
 
-        <!-- ПРОМО БЛОК ИНТЕРАКТИВНОЙ ВЕРСИИ -->
-        <div class="content-section">
-            <div class="interactive-promo">
-                <h3>🎮 Исследуйте интерактивную версию</h3>
-                <p>Получите полный контроль над диаграммой с расширенными возможностями навигации и анализа</p>
-                <a href="{output_base}_vis.html" class="promo-btn" target="_blank">Открыть интерактивную версию</a>
-            </div>
-        </div>
+_HTML_HEAD = _HTML_DOCTYPE + _STATIC_CSS + _HTML_DIAGRAM_OPEN
 
-        <!-- СТАТИСТИКА И АНАЛИЗ -->
-        <div class="content-section">
-            <div class="section">
-                <h2 class="section-header">Статистика процесса</h2>
-                <div class="stats-grid">
-                    <div class="stat-item">
-                        <span class="stat-value">{analysis.operations_count}</span>
-                        <span class="stat-label">Операций</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-value">{len(analysis.external_inputs)}</span>
-                        <span class="stat-label">Внешние входы</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-value">{len(analysis.final_outputs)}</span>
-                        <span class="stat-label">Конечные выходы</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-value">{len(analysis.critical_points)}</span>
-                        <span class="stat-label">Критические операции</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-value">{len(analysis.merge_points)}</span>
-                        <span class="stat-label">Точек слияния</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-value">{len(analysis.split_points)}</span>
-                        <span class="stat-label">Точек разветвления</span>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Критические операции -->
-            {critical_ops_html}
-
-            <!-- Реестр операций -->
-            <div class="section">
-                <h2 class="section-header">Реестр операций</h2>
-                {create_simple_table(
-                    ["Операция"] + 
-                    (["Группа"] if available_cols['group'] else []) +
-                    (["Владелец"] if available_cols['owner'] else []) +
-                    ["Входы", "Выходы", "Тип узла"] +
-                    (["Описание"] if available_cols['detailed_desc'] else []),
-                    op_rows
-                )}
-            </div>
-
-            <!-- Реестр входов/выходов -->
-            <div class="section">
-                <h2 class="section-header">Входы и выходы системы</h2>
-                {create_simple_table(
-                    ["Элемент", "Источник", "Потребители"],
-                    io_rows
-                )}
-            </div>
-        </div>
-    </div>
-
-    <script>
+# Статический скрипт навигации и конец документа
+_HTML_JS_TAIL = _minify_static('''    <script>
         // Минималистичная конфигурация Mermaid
-        const mermaidConfig = {{
-            startOnLoad: true,
+        const mermaidConfig = {
+            // Диаграмма рисуется явным вызовом mermaid.run в boot
+            startOnLoad: false,
             theme: 'default',
             securityLevel: 'loose',
             fontFamily: 'Arial, sans-serif',
-            flowchart: {{
+            flowchart: {
                 useMaxWidth: true,
                 htmlLabels: true,
                 curve: 'basis',
@@ -481,8 +367,8 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
                 rankSep: 80,
                 wrap: true,
                 wrappingWidth: 150
-            }}
-        }};
+            }
+        };
 
         // Состояние навигации
         let scale = 1.0;
@@ -494,41 +380,60 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
         const mermaidElement = document.getElementById('mermaid-diagram');
         const zoomInfo = document.getElementById('zoomInfo');
         
-        // Инициализация при загрузке
-        document.addEventListener('DOMContentLoaded', async function() {{
+        // SVG диаграммы ищется в DOM один раз после отрисовки Mermaid, дальше берется из переменной
+        let diagramSvg = null;
+        function getDiagramSvg() {
+            return diagramSvg || (diagramSvg = mermaidElement.querySelector('svg'));
+        }
+        
+        // Кнопки панели управления: один делегированный обработчик вместо onclick на каждой кнопке
+        const controlActions = { zoomIn, zoomOut, resetView, fitToScreen, openInteractive, downloadPNG };
+        document.querySelector('.diagram-controls').addEventListener('click', function(e) {
+            const button = e.target.closest('[data-action]');
+            if (button) controlActions[button.dataset.action]();
+        });
+        
+        // Инициализация после разбора документа (библиотеки подключены с defer и к этому моменту загружены)
+        async function boot() {
             // Инициализация Mermaid
             mermaid.initialize(mermaidConfig);
             
-            try {{
+            try {
                 // Переинициализация Mermaid для преобразования диаграммы
-                await mermaid.run({{ querySelector: '.mermaid' }});
+                await mermaid.run({ querySelector: '.mermaid' });
                 
                 // После рендеринга Mermaid подгоняем диаграмму под экран
-                setTimeout(() => {{
+                setTimeout(() => {
                     fitToScreen();
                     setupNavigation();
-                }}, 100);
+                }, 100);
                 
-            }} catch (error) {{
+            } catch (error) {
                 console.error('Ошибка рендеринга Mermaid:', error);
-            }}
-        }});
+            }
+        }
         
-        function setupNavigation() {{
+        if (document.readyState === 'loading') {
+            document.addEventListener('DOMContentLoaded', boot, { once: true });
+        } else {
+            boot();
+        }
+        
+        function setupNavigation() {
             // Перетаскивание для панорамирования
             diagramContainer.addEventListener('mousedown', startDragging);
             document.addEventListener('mousemove', drag);
             document.addEventListener('mouseup', stopDragging);
             
             // Масштабирование колесом мыши
-            diagramContainer.addEventListener('wheel', onWheel, {{ passive: false }});
+            diagramContainer.addEventListener('wheel', onWheel, { passive: false });
             
             // Обработка клавиатуры
             document.addEventListener('keydown', onKeyDown);
-        }}
+        }
         
-        function startDragging(e) {{
-            if (e.button === 0) {{ // Левая кнопка мыши
+        function startDragging(e) {
+            if (e.button === 0) { // Левая кнопка мыши
                 isDragging = true;
                 diagramContainer.classList.add('dragging');
                 startX = e.clientX;
@@ -536,10 +441,10 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
                 startScrollX = diagramContainer.scrollLeft;
                 startScrollY = diagramContainer.scrollTop;
                 e.preventDefault();
-            }}
-        }}
+            }
+        }
         
-        function drag(e) {{
+        function drag(e) {
             if (!isDragging) return;
             
             const deltaX = e.clientX - startX;
@@ -549,117 +454,123 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
             diagramContainer.scrollTop = startScrollY - deltaY;
             
             e.preventDefault();
-        }}
+        }
         
-        function stopDragging() {{
+        function stopDragging() {
             isDragging = false;
             diagramContainer.classList.remove('dragging');
-        }}
+        }
         
-        function onWheel(e) {{
+        function onWheel(e) {
             e.preventDefault();
             
             const rect = diagramContainer.getBoundingClientRect();
-            const mouseX = e.clientX - rect.left;
-            const mouseY = e.clientY - rect.top;
+            const delta = -Math.sign(e.deltaY) * (e.ctrlKey ? 0.05 : 0.1);
+            // Масштаб сохраняет позицию под курсором
+            queueZoom(delta, e.clientX - rect.left, e.clientY - rect.top);
+        }
+        
+        // Шаги масштаба (колесо, удержание клавиш) копятся и применяются не чаще одного раза за кадр
+        let pendingZoom = 0;
+        let zoomAnchorX = 0, zoomAnchorY = 0;
+        let zoomFrame = 0;
+        
+        function queueZoom(delta, anchorX, anchorY) {
+            pendingZoom += delta;
+            zoomAnchorX = anchorX;
+            zoomAnchorY = anchorY;
+            if (!zoomFrame) {
+                zoomFrame = requestAnimationFrame(flushZoom);
+            }
+        }
+        
+        function flushZoom() {
+            zoomFrame = 0;
+            const delta = pendingZoom;
+            pendingZoom = 0;
+            
+            const newScale = Math.max(0.1, Math.min(10, scale + delta)); // УВЕЛИЧЕНО ДО 1000%
+            if (newScale === scale) return;
             
             // Сохраняем текущую позицию скролла
             const scrollX = diagramContainer.scrollLeft;
             const scrollY = diagramContainer.scrollTop;
             
-            const delta = -Math.sign(e.deltaY) * (e.ctrlKey ? 0.05 : 0.1);
-            const newScale = Math.max(0.1, Math.min(10, scale + delta)); // УВЕЛИЧЕНО ДО 1000%
+            const oldScale = scale;
+            scale = newScale;
+            updateScale();
+            updateZoomInfo();
             
-            if (newScale !== scale) {{
-                const oldScale = scale;
-                scale = newScale;
-                updateScale();
-                updateZoomInfo();
-                
-                // Корректируем скролл для сохранения позиции под курсором
-                const scaleRatio = newScale / oldScale;
-                diagramContainer.scrollLeft = mouseX * scaleRatio - (mouseX - scrollX);
-                diagramContainer.scrollTop = mouseY * scaleRatio - (mouseY - scrollY);
-            }}
-        }}
-        
-        function onKeyDown(e) {{
+            // Корректируем скролл для сохранения точки привязки
+            const scaleRatio = newScale / oldScale;
+            diagramContainer.scrollLeft = zoomAnchorX * scaleRatio - (zoomAnchorX - scrollX);
+            diagramContainer.scrollTop = zoomAnchorY * scaleRatio - (zoomAnchorY - scrollY);
+        }
+        
+        function cancelZoom() {
+            // Отложенный шаг масштаба не должен применяться поверх сброса вида
+            if (zoomFrame) {
+                cancelAnimationFrame(zoomFrame);
+                zoomFrame = 0;
+            }
+            pendingZoom = 0;
+        }
+        
+        function onKeyDown(e) {
             // Горячие клавиши для масштабирования
-            if ((e.ctrlKey || e.metaKey) && !e.altKey) {{
-                if (e.key === '=' || e.key === '+') {{
+            if ((e.ctrlKey || e.metaKey) && !e.altKey) {
+                if (e.key === '=' || e.key === '+') {
                     e.preventDefault();
                     zoomIn();
-                }} else if (e.key === '-') {{
+                } else if (e.key === '-') {
                     e.preventDefault();
                     zoomOut();
-                }} else if (e.key === '0') {{
+                } else if (e.key === '0') {
                     e.preventDefault();
                     resetView();
-                }} else if (e.key === '1') {{
+                } else if (e.key === '1') {
                     e.preventDefault();
                     fitToScreen();
-                }}
-            }}
+                }
+            }
             
             // Escape для выхода из режима перетаскивания
-            if (e.key === 'Escape' && isDragging) {{
+            if (e.key === 'Escape' && isDragging) {
                 stopDragging();
-            }}
+            }
             
             // I для открытия интерактивной версии
-            if (e.key === 'i' || e.key === 'I') {{
+            if (e.key === 'i' || e.key === 'I') {
                 e.preventDefault();
                 openInteractive();
-            }}
-        }}
+            }
+        }
         
-        function zoomIn() {{
+        function zoomAtCenter(delta) {
+            // Масштаб сохраняет центр видимой области
             const rect = diagramContainer.getBoundingClientRect();
-            const centerX = rect.width / 2;
-            const centerY = rect.height / 2;
-            
-            const scrollX = diagramContainer.scrollLeft;
-            const scrollY = diagramContainer.scrollTop;
-            
-            const oldScale = scale;
-            scale = Math.min(10, scale + 0.1); // УВЕЛИЧЕНО ДО 1000%
-            updateScale();
-            updateZoomInfo();
-            
-            // Корректируем скролл для сохранения центра
-            const scaleRatio = scale / oldScale;
-            diagramContainer.scrollLeft = centerX * scaleRatio - (centerX - scrollX);
-            diagramContainer.scrollTop = centerY * scaleRatio - (centerY - scrollY);
-        }}
+            queueZoom(delta, rect.width / 2, rect.height / 2);
+        }
         
-        function zoomOut() {{
-            const rect = diagramContainer.getBoundingClientRect();
-            const centerX = rect.width / 2;
-            const centerY = rect.height / 2;
-            
-            const scrollX = diagramContainer.scrollLeft;
-            const scrollY = diagramContainer.scrollTop;
-            
-            const oldScale = scale;
-            scale = Math.max(0.1, scale - 0.1);
-            updateScale();
-            updateZoomInfo();
-            
-            // Корректируем скролл для сохранения центра
-            const scaleRatio = scale / oldScale;
-            diagramContainer.scrollLeft = centerX * scaleRatio - (centerX - scrollX);
-            diagramContainer.scrollTop = centerY * scaleRatio - (centerY - scrollY);
-        }}
+        function zoomIn() {
+            zoomAtCenter(0.1);
+        }
+        
+        function zoomOut() {
+            zoomAtCenter(-0.1);
+        }
         
-        function resetView() {{
+        function resetView() {
+            cancelZoom();
             scale = 1.0;
             updateScale();
             updateZoomInfo();
             centerDiagram();
-        }}
+        }
         
-        function fitToScreen() {{
-            const svg = mermaidElement.querySelector('svg');
+        function fitToScreen() {
+            cancelZoom();
+            const svg = getDiagramSvg();
             if (!svg) return;
             
             const container = diagramContainer;
@@ -675,10 +586,10 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
             updateScale();
             updateZoomInfo();
             centerDiagram();
-        }}
+        }
         
-        function centerDiagram() {{
-            const svg = mermaidElement.querySelector('svg');
+        function centerDiagram() {
+            const svg = getDiagramSvg();
             if (!svg) return;
             
             const svgRect = svg.getBoundingClientRect();
@@ -686,31 +597,32 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
             
             diagramContainer.scrollLeft = (svgRect.width * scale - container.clientWidth) / 2;
             diagramContainer.scrollTop = (svgRect.height * scale - container.clientHeight) / 2;
-        }}
+        }
         
-        function updateScale() {{
-            const svg = mermaidElement.querySelector('svg');
-            if (svg) {{
-                svg.style.transform = `scale(${{scale}})`;
+        function updateScale() {
+            const svg = getDiagramSvg();
+            if (svg) {
+                svg.style.transform = `scale(${scale})`;
                 svg.style.transformOrigin = '0 0';
-            }}
-        }}
+            }
+        }
         
-        function updateZoomInfo() {{
+        function updateZoomInfo() {
             const percentage = Math.round(scale * 100);
-            zoomInfo.textContent = `${{percentage}}%`;
-        }}
+            zoomInfo.textContent = `${percentage}%`;
+        }
         
-        function openInteractive() {{
-            window.open('{output_base}_vis.html', '_blank');
-        }}
+        function openInteractive() {
+            // Адрес берется из ссылки промо-блока, чтобы скрипт не зависел от имени файла
+            window.open(document.getElementById('interactiveLink').getAttribute('href'), '_blank');
+        }
         
-        function downloadPNG() {{
-            const svg = mermaidElement.querySelector('svg');
-            if (!svg) {{
+        function downloadPNG() {
+            const svg = getDiagramSvg();
+            if (!svg) {
                 alert('SVG элемент не найден');
                 return;
-            }}
+            }
             
             // Создаем временный контейнер для рендеринга
             const tempContainer = document.createElement('div');
@@ -728,34 +640,298 @@ def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData,
             tempContainer.appendChild(clonedSvg);
             document.body.appendChild(tempContainer);
             
-            html2canvas(tempContainer, {{
+            html2canvas(tempContainer, {
                 backgroundColor: '#ffffff',
                 scale: 2,
                 useCORS: true,
                 allowTaint: false,
                 logging: false
-            }}).then(canvas => {{
+            }).then(canvas => {
                 const link = document.createElement('a');
                 link.download = 'business_process_diagram.png';
                 link.href = canvas.toDataURL('image/png');
                 link.click();
                 document.body.removeChild(tempContainer);
-            }}).catch(error => {{
+            }).catch(error => {
                 console.error('Ошибка при создании PNG:', error);
                 document.body.removeChild(tempContainer);
                 alert('Ошибка при создании PNG файла');
-            }});
-        }}
+            });
+        }
         
         // Обработка изменения размера окна
-        window.addEventListener('resize', function() {{
+        window.addEventListener('resize', function() {
             setTimeout(updateZoomInfo, 100);
-        }});
+        });
     </script>
 </body>
-</html>'''
+</html>''')
+
+# Конец блока диаграммы, промо-блок и статистика процесса (заполняется через format_map)
+_STATS_TMPL = '''
+                </div>
+            </div>
+            <div class="nav-hint">
+                Колесо мыши - масштаб • ЛКМ + перетаскивание - навигация • Ctrl+колесо - точный масштаб
+            </div>
+        </div>
+
+        <!-- ПРОМО БЛОК ИНТЕРАКТИВНОЙ ВЕРСИИ -->
+        <div class="content-section">
+            <div class="interactive-promo">
+                <h3>🎮 Исследуйте интерактивную версию</h3>
+                <p>Получите полный контроль над диаграммой с расширенными возможностями навигации и анализа</p>
+                <a href="{output_base}_vis.html" class="promo-btn" id="interactiveLink" target="_blank">Открыть интерактивную версию</a>
+            </div>
+        </div>
+
+        <!-- СТАТИСТИКА И АНАЛИЗ -->
+        <div class="content-section">
+            <div class="section">
+                <h2 class="section-header">Статистика процесса</h2>
+                <div class="stats-grid">
+                    <div class="stat-item">
+                        <span class="stat-value">{ops}</span>
+                        <span class="stat-label">Операций</span>
+                    </div>
+                    <div class="stat-item">
+                        <span class="stat-value">{ext}</span>
+                        <span class="stat-label">Внешние входы</span>
+                    </div>
+                    <div class="stat-item">
+                        <span class="stat-value">{fin}</span>
+                        <span class="stat-label">Конечные выходы</span>
+                    </div>
+                    <div class="stat-item">
+                        <span class="stat-value">{crit}</span>
+                        <span class="stat-label">Критические операции</span>
+                    </div>
+                    <div class="stat-item">
+                        <span class="stat-value">{merge}</span>
+                        <span class="stat-label">Точек слияния</span>
+                    </div>
+                    <div class="stat-item">
+                        <span class="stat-value">{split}</span>
+                        <span class="stat-label">Точек разветвления</span>
+                    </div>
+                </div>
+            </div>
+
+            <!-- Критические операции -->
+            '''
+
+# Все колонки реестра операций в порядке вывода; необязательные отбираются по данным
+_OP_HEADERS = ("Операция", "Группа", "Владелец", "Входы", "Выходы", "Тип узла", "Описание")
+
+@lru_cache(maxsize=64)
+def _stats_html(output_base: str, ops: int, ext: int, fin: int, crit: int, merge: int, split: int) -> str:
+    """Промо-блок и карточки статистики: чистая функция счетчиков"""
+    return _STATS_TMPL.format_map({
+        # Имя файла попадает в атрибут href - экранируются и кавычки
+        "output_base": html_escape(output_base, quote=True),
+        "ops": ops,
+        "ext": ext,
+        "fin": fin,
+        "crit": crit,
+        "merge": merge,
+        "split": split,
+    })
+
+# Секция критических операций: постоянные начало и конец, шаблон пункта
+_CRIT_SECTION_OPEN = """
+            <div class="section">
+                <h2 class="section-header">Критические операции</h2>
+                """
+_CRIT_ITEM_TMPL = """
+                <div class="critical-item">
+                    <strong>{operation}</strong><br>
+                    {inputs_count} входов, выход используется в {output_reuse} операциях
+                </div>
+            """
+_CRIT_SECTION_CLOSE = """
+            </div>
+        """
+
+def _critical_html(critical_points: Sequence[CriticalPoint]) -> str:
+    """Секция критических операций (точки в порядке анализа)"""
+    if not critical_points:
+        return ""
+    html = [_CRIT_SECTION_OPEN]
+    html.extend(
+        _CRIT_ITEM_TMPL.format(operation=html_escape(cp.operation, quote=False),
+                               inputs_count=cp.inputs_count, output_reuse=cp.output_reuse)
+        for cp in critical_points
+    )
+    html.append(_CRIT_SECTION_CLOSE)
+    return "".join(html)
+
+def generate_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData, operations: Dict[str, Operation], 
+                               choices: Choices, available_columns: List[str], output_file: Path, output_base: str) -> None:
+    """
+    Генерирует минималистичный HTML отчет с акцентом на диаграмму
+    """
+    _write_parts(output_file, _render_minimal_html_report(
+        mermaid_code, analysis_data, operations, available_columns, output_base
+    ))
+
+# Буфер записи отчета: тысячи мелких фрагментов строк уходят на диск крупными блоками
+_WRITE_BUFFER_SIZE = 1 << 20
+
+def _write_parts(output_file: Path, parts: Iterable[str]) -> None:
+    """Потоковая запись фрагментов: документ целиком в памяти не склеивается"""
+    # Запись во временный файл и атомарная подмена: открытый в браузере отчет не бывает недописанным
+    tmp_file = output_file.with_name(output_file.name + ".tmp")
+    try:
+        with tmp_file.open("wb", buffering=_WRITE_BUFFER_SIZE) as f:
+            for part in parts:
+                f.write(part.encode(ENCODING))
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+def _render_minimal_html_report(mermaid_code: str, analysis_data: AnalysisData, operations: Dict[str, Operation],
+                                available_columns: List[str], output_base: str) -> Iterator[str]:
+    """Фрагменты HTML отчета по порядку: писатель получает их по мере готовности"""
+    analysis = analysis_data.analysis
+
+    # Статическое начало, диаграмма, статистика и критические операции не зависят от таблиц
+    yield _HTML_HEAD
+    # Код диаграммы экранируется один раз: Mermaid сам декодирует сущности при чтении блока
+    yield html_escape(mermaid_code, quote=False)
+    yield _stats_html(
+        output_base,
+        analysis.operations_count,
+        len(analysis.external_inputs),
+        len(analysis.final_outputs),
+        len(analysis.critical_points),
+        len(analysis.merge_points),
+        len(analysis.split_points),
+    )
+    # Критические операции уже упорядочены анализом (точки неизменяемы и хешируемы - кортеж служит ключом кэша)
+    yield _critical_html(analysis.critical_points)
+
+    # Подготовка данных для таблиц: связи входов с операциями уже построены анализом
+    input_to_operations = analysis_data.input_to_operations
+    split_outputs = analysis_data.split_outputs
+    
+    # Определение доступных колонок (один раз, а не для каждой операции)
+    present = (
+        True,
+        'Группа' in available_columns,
+        'Владелец' in available_columns,
+        True, True, True,
+        'Подробное описание операции' in available_columns,
+    )
+    headers = list(compress(_OP_HEADERS, present))
+    # Выборка нужных колонок из полной строки (в itemgetter всегда не меньше двух индексов - результат кортеж)
+    project = itemgetter(*compress(range(len(_OP_HEADERS)), present))
+    
+    # Реестр операций: строки - кортежи в порядке колонок (размер известен заранее)
+    op_rows: List[Tuple[str, ...]] = [None] * len(operations)
+    critical_ops = {c.operation for c in analysis.critical_points}
+    
+    for i, (name, op) in enumerate(operations.items()):
+        is_split = not split_outputs.isdisjoint(op.outputs)
+        op_rows[i] = project((
+            name,
+            op.group or "",
+            op.owner or "",
+            op.inputs_csv,
+            op.outputs_csv,
+            NODE_TYPE_LABELS[(name in critical_ops) << 2 | op.is_merge << 1 | is_split],
+            op.detailed or "",
+        ))
+    
+    # Таблицы передаются писателю по фрагментам, без промежуточной склейки в строку
+    yield '''
+
+            <!-- Реестр операций -->
+            <div class="section">
+                <h2 class="section-header">Реестр операций</h2>
+                '''
+    yield from _table_parts(headers, op_rows)
+
+    # Реестр входов/выходов
+    io_rows = []
+    # set.union обходит множества и представления keys() на уровне C, без промежуточных копий
+    items = set().union(analysis.external_inputs, analysis.final_outputs,
+                        analysis_data.output_to_operation.keys(), input_to_operations.keys())
+    items.discard("")
+    # Без учета регистра: при сравнении по кодам символов все заглавные шли бы раньше строчных
+    for item in sorted(items, key=casefold_key):
+        src = "ВНЕШНИЙ ВХОД" if item in analysis.external_inputs else analysis_data.output_to_operation.get(item, "-")
+        tgts = input_to_operations.get(item, [])
+        if item in analysis.final_outputs and not tgts:
+            tgts = ["КОНЕЧНЫЙ ВЫХОД"]
+        io_rows.append((item, src, ", ".join(tgts) if tgts else "-"))
+
+    yield '''
+            </div>
+
+            <!-- Реестр входов/выходов -->
+            <div class="section">
+                <h2 class="section-header">Входы и выходы системы</h2>
+                '''
+    yield from _table_parts(["Элемент", "Источник", "Потребители"], io_rows)
+    yield '''
+            </div>
+        </div>
+    </div>
+
+'''
+    yield _HTML_JS_TAIL
+
+# Страница для процесса без операций
+_EMPTY_HTML = '''<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <title>Диаграмма бизнес-процесса</title>
+</head>
+<body style="font-family: Arial, sans-serif; padding: 30px; color: #2c3e50;">
+    <p>Нет данных для отображения</p>
+</body>
+</html>'''.encode(ENCODING)
 
-    output_file.write_text(html_content, encoding=ENCODING)
+def _report_fingerprint(mermaid_code: str, operations: Dict[str, Operation], analysis_data: AnalysisData,
+                        available_columns: List[str], output_base: str) -> tuple:
+    """Отпечаток всех данных, от которых зависит HTML отчет"""
+    ops_key = tuple(
+        (name, tuple(op.inputs), tuple(op.outputs), op.subgroup, op.node_text, op.group, op.owner, op.detailed)
+        for name, op in operations.items()
+    )
+    critical_key = tuple(
+        (cp.operation, cp.inputs_count, cp.output_reuse) for cp in analysis_data.analysis.critical_points
+    )
+    # Готовый код диаграммы учитывает и данные, и текущую логику построения Mermaid
+    return (mermaid_code, ops_key, critical_key, tuple(available_columns), output_base)
+
+# Подпись содержимого в конце файла: повторный запуск на тех же данных не перезаписывает отчет.
+# В подпись входят версия приложения, шаблоны и таблицы, по которым строятся ячейки,
+# чтобы обновленное приложение пересобрало старые отчеты
+_TEMPLATE_DIGEST = hashlib.blake2b(
+    repr((APP_VERSION, _HTML_HEAD, _HTML_JS_TAIL, _STATS_TMPL, _CRIT_ITEM_TMPL, STYLES,
+          NODE_TYPE_LABELS, _OP_HEADERS, _HTML_TRANS)).encode(ENCODING),
+    digest_size=8,
+).hexdigest()
+_SIGNATURE_TMPL = "\n<!-- report-signature: {} -->"
+
+def _report_signature(key: tuple) -> str:
+    """Комментарий с хешем отпечатка отчета"""
+    digest = hashlib.blake2b(repr((_TEMPLATE_DIGEST, key)).encode(ENCODING), digest_size=16).hexdigest()
+    return _SIGNATURE_TMPL.format(digest)
+
+def _has_signature(output_file: Path, signature: str) -> bool:
+    """Заканчивается ли существующий файл отчета той же подписью"""
+    expected = signature.encode(ENCODING)
+    try:
+        with output_file.open("rb") as f:
+            f.seek(-len(expected), os.SEEK_END)
+            return f.read() == expected
+    except OSError:
+        # Файла нет или он короче подписи
+        return False
 
 def export_html_mermaid(operations: Dict[str, Operation], analysis_data: AnalysisData, 
                        choices: Choices, available_columns: List[str], output_base: str = None, output_dir: Path = None) -> Path:
@@ -768,12 +944,23 @@ def export_html_mermaid(operations: Dict[str, Operation], analysis_data: Analysi
     
     output_file = output_dir / f"{output_base}.html"
 
+    # Без операций диаграмму строить не из чего - пишем заготовленную пустую страницу
+    if not operations:
+        output_file.write_bytes(_EMPTY_HTML)
+        return output_file
+
     # Генерация Mermaid кода
     from exporters.mermaid_exporter import build_mermaid_html
     mermaid_code = build_mermaid_html(operations, analysis_data, choices)
 
-    # Генерация минималистичного HTML отчета
-    generate_minimal_html_report(mermaid_code, analysis_data, operations, choices, available_columns, output_file, output_base)
+    # Отчет на диске уже построен по тем же данным - ни сборки страницы, ни записи
+    signature = _report_signature(_report_fingerprint(
+        mermaid_code, operations, analysis_data, available_columns, output_base
+    ))
+    if not _has_signature(output_file, signature):
+        # Генерация минималистичного HTML отчета: фрагменты сразу уходят на диск
+        parts = _render_minimal_html_report(mermaid_code, analysis_data, operations, available_columns, output_base)
+        _write_parts(output_file, chain(parts, (signature,)))
     
     print(f"\n" + "="*60)
     print("✓ МИНИМАЛИСТИЧНЫЙ HTML-ОТЧЕТ СОЗДАН!")
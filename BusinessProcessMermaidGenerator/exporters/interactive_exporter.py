@@ -8,6 +8,12 @@ from models import Operation, Choices, AnalysisData
 from utils import safe_id
 from config import ENCODING
 
+# Вид узла с тем же индексом, что и NODE_TYPE_LABELS: критичность << 2 | слияние << 1 | разветвление
+_NODE_KINDS = (
+    "normal", "split", "merge", "merge_split",
+    "critical", "critical", "critical", "critical",
+)
+
 def build_interactive_html_data(
     operations: Dict[str, Operation],
     analysis_data: AnalysisData,
@@ -46,27 +52,16 @@ def build_interactive_html_data(
                 "font": {"size": 14, "color": "#ffffff"}
             })
     
-    # Создаем mapping от входа к операциям, которые его используют
-    from collections import defaultdict
-    input_to_operations = defaultdict(list)
-    for name, op in operations.items():
-        for inp in op.inputs:
-            if inp:
-                input_to_operations[inp].append(name)
+    # Mapping от входа к операциям, которые его используют, уже построен анализом
+    input_to_operations = analysis_data.input_to_operations
+    split_outputs = analysis_data.split_outputs
     
     # Добавляем операции
     critical_ops = {c.operation for c in analysis.critical_points}
     
     for name, op in operations.items():
-        is_merge = len(op.inputs) > 1
-        is_split = any(len(input_to_operations.get(out, [])) > 1 for out in op.outputs)
-        
-        node_type = "critical" if name in critical_ops else (
-            "merge_split" if is_merge and is_split else
-            "merge" if is_merge else
-            "split" if is_split else
-            "normal"
-        )
+        is_split = not split_outputs.isdisjoint(op.outputs)
+        node_type = _NODE_KINDS[(name in critical_ops) << 2 | op.is_merge << 1 | is_split]
         
         # Определяем цвет в зависимости от типа узла
         color_config = {
@@ -160,12 +155,8 @@ def build_interactive_html_data(
         ]
     }
 
-def generate_interactive_html_file(html_data: Dict[str, Any], output_file: Path) -> None:
-    """
-    Генерирует HTML-файл с интерактивной диаграммой на vis-network
-    """
-    
-    html_template = '''<!DOCTYPE html>
+# Шаблон страницы разрезается по месту данных один раз при импорте
+_HTML_BEFORE_DATA, _HTML_AFTER_DATA = '''<!DOCTYPE html>
 <html lang="ru">
 <head>
     <meta charset="UTF-8">
@@ -478,15 +469,16 @@ def generate_interactive_html_file(html_data: Dict[str, Any], output_file: Path)
         document.addEventListener('DOMContentLoaded', initNetwork);
     </script>
 </body>
-</html>'''
+</html>'''.split('{DIAGRAM_DATA}')
 
-    # Заменяем данные в шаблоне
-    html_content = html_template.replace(
-        '{DIAGRAM_DATA}', 
-        json.dumps(html_data, ensure_ascii=False, indent=2)
-    )
+def generate_interactive_html_file(html_data: Dict[str, Any], output_file: Path) -> None:
+    """
+    Генерирует HTML-файл с интерактивной диаграммой на vis-network
+    """
     
-    output_file.write_text(html_content, encoding=ENCODING)
+    # Данные графа вставляются между заранее разрезанными частями шаблона
+    diagram_data = json.dumps(html_data, ensure_ascii=False, indent=2)
+    output_file.write_bytes((_HTML_BEFORE_DATA + diagram_data + _HTML_AFTER_DATA).encode(ENCODING))
 
 def export_interactive_html(operations: Dict[str, Operation], analysis_data: AnalysisData, 
                            choices: Choices, output_base: str = None, output_dir: Path = None) -> Path:
@@ -1,11 +1,19 @@
 """
 Экспорт в Mermaid формат (Markdown и HTML) с улучшениями
 """
-from typing import Dict, Set, List, Tuple
+from itertools import compress
+from operator import itemgetter
+from typing import Callable, Dict, Set, List, Tuple, FrozenSet, Optional
 from pathlib import Path
 from models import Operation, Choices, ProcessAnalysis, AnalysisData
-from utils import safe_id, escape_text, _escape_multiline, create_markdown_table
-from config import ENCODING, STYLES
+from utils import safe_id, escape_text, _escape_multiline, create_markdown_table, casefold_key
+from config import ENCODING, STYLES, NODE_TYPE_LABELS
+
+# Класс узла Mermaid с тем же индексом, что и NODE_TYPE_LABELS (слияние важнее разветвления)
+_NODE_STYLES = (
+    "", ":::split", ":::merge", ":::merge",
+    ":::critical", ":::critical", ":::critical", ":::critical",
+)
 
 def build_mermaid_md(
     operations: Dict[str, Operation],
@@ -19,6 +27,7 @@ def build_mermaid_md(
     final_outputs = analysis_data.final_outputs
     output_to_operation = analysis_data.output_to_operation
     input_to_operations = analysis_data.input_to_operations
+    split_outputs = analysis_data.split_outputs
     analysis = analysis_data.analysis
     
     lines = ["```mermaid", "graph LR"]
@@ -37,17 +46,16 @@ def build_mermaid_md(
     # Если отключена группировка или нет столбца для группировки
     if choices.no_grouping or not choices.subgroup_column:
         for name in sorted(operations):
-            lines.append(_node_line_md(name, operations[name], input_to_operations, critical_ops))
+            lines.append(_node_line_md(name, operations[name], split_outputs, critical_ops))
     else:
-        from collections import defaultdict
-        subgroup_ops = defaultdict(list)
+        subgroup_ops: Dict[Optional[str], List[str]] = {}
         for name, op in operations.items():
-            # Добавляем только операции с указанной подгруппой
-            if op.subgroup and str(op.subgroup).strip() and str(op.subgroup).strip() != "nan":
-                subgroup_ops[op.subgroup].append(name)
+            # Добавляем только операции с указанной подгруппой (пустые теги - None после очистки в Operation)
+            if op.subgroup:
+                subgroup_ops.setdefault(op.subgroup, []).append(name)
             else:
                 # Операции без подгруппы добавляем в отдельную категорию
-                subgroup_ops[None].append(name)
+                subgroup_ops.setdefault(None, []).append(name)
 
         # Сначала добавляем подгруппы с определенными значениями
         for subgroup in sorted([sg for sg in subgroup_ops.keys() if sg is not None]):
@@ -55,13 +63,13 @@ def build_mermaid_md(
             sg_id = "group_" + safe_id(subgroup)
             lines.append(f'    subgraph {sg_id}["{escape_text(subgroup)}"]')
             for name in sorted(subgroup_ops[subgroup]):
-                lines.append(_node_line_md(name, operations[name], input_to_operations, critical_ops))
+                lines.append(_node_line_md(name, operations[name], split_outputs, critical_ops))
             lines.append("    end")
         
         # Затем добавляем операции без подгруппы (если есть)
         if None in subgroup_ops and subgroup_ops[None]:
             for name in sorted(subgroup_ops[None]):
-                lines.append(_node_line_md(name, operations[name], input_to_operations, critical_ops))
+                lines.append(_node_line_md(name, operations[name], split_outputs, critical_ops))
 
     added = set()
     for name, op in operations.items():
@@ -97,21 +105,12 @@ def build_mermaid_md(
     return "\n".join(lines)
 
 def _node_line_md(name: str, op: Operation,
-               input_to_operations: Dict[str, List[str]],
+               split_outputs: FrozenSet[str],
                critical_ops: Set[str]) -> str:
     node_id = safe_id(name)
-    if name in critical_ops:
-        style = ":::critical"
-    else:
-        is_merge = len(op.inputs) > 1
-        # Проверяем разветвление по всем выходам
-        is_split = any(len(input_to_operations.get(out, [])) > 1 for out in op.outputs)
-        style = (
-            ":::merge" if is_merge and is_split else
-            ":::merge" if is_merge else
-            ":::split" if is_split else
-            ""
-        )
+    # Разветвление: хотя бы один выход уходит в несколько операций
+    is_split = not split_outputs.isdisjoint(op.outputs)
+    style = _NODE_STYLES[(name in critical_ops) << 2 | op.is_merge << 1 | is_split]
     return f'    {node_id}["{escape_text(op.node_text)}"]{style}'
 
 def build_mermaid_html(
@@ -126,6 +125,7 @@ def build_mermaid_html(
     final_outputs = analysis_data.final_outputs
     output_to_operation = analysis_data.output_to_operation
     input_to_operations = analysis_data.input_to_operations
+    split_outputs = analysis_data.split_outputs
     analysis = analysis_data.analysis
     
     lines = ["graph LR"]
@@ -142,15 +142,14 @@ def build_mermaid_html(
             lines.append(f'    {safe_id(out)}(["{escape_text(out)}"]):::final')
 
     # Группировка для HTML Mermaid
-    from collections import defaultdict
-    subgroup_ops = defaultdict(list)
+    subgroup_ops: Dict[Optional[str], List[str]] = {}
     for name, op in operations.items():
-        # Добавляем только операции с указанной подгруппой
-        if op.subgroup and str(op.subgroup).strip() and str(op.subgroup).strip() != "nan":
-            subgroup_ops[op.subgroup].append(name)
+        # Добавляем только операции с указанной подгруппой (пустые теги - None после очистки в Operation)
+        if op.subgroup:
+            subgroup_ops.setdefault(op.subgroup, []).append(name)
         else:
             # Операции без подгруппы добавляем в отдельную категорию
-            subgroup_ops[None].append(name)
+            subgroup_ops.setdefault(None, []).append(name)
 
     if choices.subgroup_column and not choices.no_grouping:
         # Сначала добавляем подгруппы с определенными значениями
@@ -159,16 +158,16 @@ def build_mermaid_html(
             sg_id = "group_" + safe_id(subgroup)
             lines.append(f'    subgraph {sg_id}["{escape_text(subgroup)}"]')
             for name in sorted(subgroup_ops[subgroup]):
-                lines.append(_node_line_html(name, operations[name], input_to_operations, critical_ops))
+                lines.append(_node_line_html(name, operations[name], split_outputs, critical_ops))
             lines.append("    end")
         
         # Затем добавляем операции без подгруппы (если есть)
         if None in subgroup_ops and subgroup_ops[None]:
             for name in sorted(subgroup_ops[None]):
-                lines.append(_node_line_html(name, operations[name], input_to_operations, critical_ops))
+                lines.append(_node_line_html(name, operations[name], split_outputs, critical_ops))
     else:
         for name in sorted(operations):
-            lines.append(_node_line_html(name, operations[name], input_to_operations, critical_ops))
+            lines.append(_node_line_html(name, operations[name], split_outputs, critical_ops))
 
     added = set()
     for name, op in operations.items():
@@ -203,20 +202,12 @@ def build_mermaid_html(
     return "\n".join(lines)
 
 def _node_line_html(name: str, op: Operation,
-                   input_to_operations: Dict[str, List[str]],
+                   split_outputs: FrozenSet[str],
                    critical_ops: Set[str]) -> str:
     node_id = safe_id(name)
-    if name in critical_ops:
-        style = ":::critical"
-    else:
-        is_merge = len(op.inputs) > 1
-        is_split = any(len(input_to_operations.get(out, [])) > 1 for out in op.outputs)
-        style = (
-            ":::merge" if is_merge and is_split else
-            ":::merge" if is_merge else
-            ":::split" if is_split else
-            ""
-        )
+    # Разветвление: хотя бы один выход уходит в несколько операций
+    is_split = not split_outputs.isdisjoint(op.outputs)
+    style = _NODE_STYLES[(name in critical_ops) << 2 | op.is_merge << 1 | is_split]
     return f'    {node_id}["{escape_text(op.node_text)}"]{style}'
 
 def _build_io_registry(
@@ -224,54 +215,72 @@ def _build_io_registry(
     final_outputs: Set[str],
     output_to_operation: Dict[str, str],
     input_to_operations: Dict[str, List[str]],
-) -> List[Dict[str, str]]:
+) -> List[Tuple[str, str, str]]:
     """
     Строит реестр входов/выходов
     """
     rows = []
-    items = external_inputs | final_outputs | set(output_to_operation) | set(input_to_operations)
-    for item in sorted(items):
-        if not item:
-            continue
+    # Ключи словарей берутся как представления keys() - без копирования в промежуточные множества
+    items = set().union(external_inputs, final_outputs,
+                        output_to_operation.keys(), input_to_operations.keys())
+    items.discard("")
+    # Без учета регистра: при сравнении по кодам символов все заглавные шли бы раньше строчных
+    for item in sorted(items, key=casefold_key):
         src = "ВНЕШНИЙ ВХОД" if item in external_inputs else output_to_operation.get(item, "-")
         tgts = input_to_operations.get(item, [])
         if item in final_outputs and not tgts:
             tgts = ["КОНЕЧНЫЙ ВЫХОД"]
-        rows.append({
-            "Вход/Выход": item,
-            "Исходная операция": src,
-            "Последующие операции": ", ".join(tgts) if tgts else "-",
-        })
+        rows.append((item, src, ", ".join(tgts) if tgts else "-"))
     return rows
 
+# Полный набор колонок реестра операций (необязательные отбираются по available_columns)
+_OP_HEADERS = ("Операция", "Группа", "Владелец", "Входы", "Выход", "Тип узла", "Подробное описание")
+
 def _build_op_registry(operations: Dict[str, Operation],
-                       input_to_operations: Dict[str, List[str]],
-                       critical_ops: Set[str]) -> List[Dict[str, str]]:
+                       split_outputs: FrozenSet[str],
+                       critical_ops: Set[str],
+                       project: Callable[[tuple], Tuple[str, ...]]) -> List[Tuple[str, ...]]:
     """
-    Строит реестр операций
+    Строит реестр операций; project отбирает нужные колонки из полной строки
     """
-    rows = []
-    for name, op in operations.items():
-        is_merge = len(op.inputs) > 1
-        is_split = any(len(input_to_operations.get(out, [])) > 1 for out in op.outputs)
-        node_type = (
-            "Супер-критичная" if name in critical_ops else
-            "Слияние+Разветвление" if is_merge and is_split else
-            "Слияние" if is_merge else
-            "Разветвление" if is_split else
-            "Обычный"
-        )
-        rows.append({
-            "Операция": name,
-            "Группа": op.group,
-            "Владелец": op.owner,
-            "Входы": ", ".join(op.inputs) if op.inputs else "-",
-            "Выход": ", ".join(op.outputs) if op.outputs else "-",
-            "Тип узла": node_type,
-            "Подробное описание": op.detailed,
-        })
+    rows = [None] * len(operations)
+    for i, (name, op) in enumerate(operations.items()):
+        is_split = not split_outputs.isdisjoint(op.outputs)
+        rows[i] = project((
+            name,
+            op.group,
+            op.owner,
+            op.inputs_csv,
+            op.outputs_csv,
+            NODE_TYPE_LABELS[(name in critical_ops) << 2 | op.is_merge << 1 | is_split],
+            op.detailed,
+        ))
     return rows
 
+# Секции анализа в Markdown: заголовок, поле анализа, шаблон пункта, текст при пустом списке
+# (точки уже упорядочены анализом по убыванию значимости)
+_MD_POINT_SECTIONS = (
+    (
+        "### Супер-критические операции (одновременно ≥ "
+        "{choices.critical_min_inputs} входов и выход используется ≥ {choices.critical_min_reuse} раз):\n",
+        "critical_points",
+        "- **{p.operation}**: {p.inputs_count} входов, выход идёт в {p.output_reuse} операций\n",
+        "- Таких операций нет\n",
+    ),
+    (
+        "\n### Критические точки слияния:\n",
+        "merge_points",
+        "- **{p.operation}**: {p.input_count} входов\n",
+        "- Нет точек слияния\n",
+    ),
+    (
+        "\n### Критические точки разветвления:\n",
+        "split_points",
+        "- **{p.output}** (из {p.source_operation}): идёт в {p.target_count} операций\n",
+        "- Нет точек разветвления\n",
+    ),
+)
+
 def export_mermaid(operations: Dict[str, Operation], analysis_data: AnalysisData, 
                   choices: Choices, available_columns: List[str], output_base: str = None, output_dir: Path = None) -> Path:
     """
@@ -298,15 +307,20 @@ def export_mermaid(operations: Dict[str, Operation], analysis_data: AnalysisData
         analysis_data.input_to_operations
     )
     
-    critical_ops = {c.operation for c in analysis_data.analysis.critical_points}
-    op_rows = _build_op_registry(operations, analysis_data.input_to_operations, critical_ops)
-
     # Определение доступных колонок
     available_cols = {
         'group': 'Группа' in available_columns,
         'owner': 'Владелец' in available_columns,
         'detailed_desc': 'Подробное описание операции' in available_columns
     }
+    present = (True, available_cols['group'], available_cols['owner'],
+               True, True, True, available_cols['detailed_desc'])
+    table_headers = list(compress(_OP_HEADERS, present))
+    # В itemgetter всегда не меньше двух индексов - результат кортеж
+    project = itemgetter(*compress(range(len(_OP_HEADERS)), present))
+
+    critical_ops = {c.operation for c in analysis_data.analysis.critical_points}
+    op_rows = _build_op_registry(operations, analysis_data.split_outputs, critical_ops, project)
 
     # Сборка Markdown контента
     md_parts = [
@@ -322,33 +336,17 @@ def export_mermaid(operations: Dict[str, Operation], analysis_data: AnalysisData
         f"- 📊 Интерактивная статистика и аналитика\n",
         f"- 🖱️  Простое перетаскивание узлов\n\n",
         f"## Анализ узлов слияния, разветвления и супер-критичных точек\n\n",
-        f"### Супер-критические операции (одновременно ≥ "
-        f"{choices.critical_min_inputs} входов и выход используется ≥ {choices.critical_min_reuse} раз):\n",
     ]
     
-    if analysis_data.analysis.critical_points:
-        for cp in sorted(analysis_data.analysis.critical_points, key=lambda x: (x.inputs_count, x.output_reuse), reverse=True):
-            md_parts.append(f"- **{cp.operation}**: {cp.inputs_count} входов, выход идёт в {cp.output_reuse} операций\n")
-    else:
-        md_parts.append("- Таких операций нет\n")
-
-    md_parts.extend([
-        "\n### Критические точки слияния:\n",
-    ])
-    if analysis_data.analysis.merge_points:
-        for point in sorted(analysis_data.analysis.merge_points, key=lambda x: x.input_count, reverse=True):
-            md_parts.append(f"- **{point.operation}**: {point.input_count} входов\n")
-    else:
-        md_parts.append("- Нет точек слияния\n")
-
-    md_parts.extend([
-        "\n### Критические точки разветвления:\n",
-    ])
-    if analysis_data.analysis.split_points:
-        for point in sorted(analysis_data.analysis.split_points, key=lambda x: x.target_count, reverse=True):
-            md_parts.append(f"- **{point.output}** (из {point.source_operation}): идёт в {point.target_count} операций\n")
-    else:
-        md_parts.append("- Нет точек разветвления\n")
+    # Три секции анализа строятся одним циклом по описаниям из _MD_POINT_SECTIONS
+    analysis = analysis_data.analysis
+    for header, points_attr, item_tmpl, empty_line in _MD_POINT_SECTIONS:
+        md_parts.append(header.format(choices=choices))
+        points = getattr(analysis, points_attr)
+        if points:
+            md_parts.extend(item_tmpl.format(p=point) for point in points)
+        else:
+            md_parts.append(empty_line)
 
     md_parts.extend([
         "\n## Реестр входов/выходов\n\n",
@@ -356,14 +354,6 @@ def export_mermaid(operations: Dict[str, Operation], analysis_data: AnalysisData
         "\n\n## Реестр операций\n\n",
     ])
 
-    table_headers = ["Операция"]
-    if available_cols['group']:
-        table_headers.append("Группа")
-    if available_cols['owner']:
-        table_headers.append("Владелец")
-    table_headers.extend(["Входы", "Выход", "Тип узла"])
-    if available_cols['detailed_desc']:
-        table_headers.append("Подробное описание")
     md_parts.append(create_markdown_table(table_headers, op_rows))
 
     md_parts.extend([
@@ -397,7 +387,7 @@ def export_mermaid(operations: Dict[str, Operation], analysis_data: AnalysisData
         md_parts.append(f"- **Текст узлов** – содержит подробное описание операций\n")
 
     # Сохранение файла
-    output_file.write_text("".join(md_parts), encoding=ENCODING)
+    output_file.write_bytes("".join(md_parts).encode(ENCODING))
 
     print(f"\n" + "="*60)
     print("✓ MARKDOWN-ДИАГРАММА УСПЕШНО СОЗДАНА!")
@@ -1,10 +1,25 @@
 """Data classes и модели данных с улучшенной валидацией"""
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Set
+from typing import List, Optional, Dict, Any, Set, FrozenSet
 from pathlib import Path
 import re
 
-@dataclass
+# Значения тегов (подгруппа, группа, владелец), которые считаются пустыми (в нижнем регистре)
+BLANK_TAG_VALUES = frozenset(("", "—", "nan", "none", "null"))
+
+def is_blank_tag(text: str) -> bool:
+    """Проверка очищенного значения тега на пустоту"""
+    return text.lower() in BLANK_TAG_VALUES
+
+def _clean_tag(value: Any) -> str:
+    """Очистка тега: пустые значения, "—" и "nan" превращаются в пустую строку"""
+    if not value:
+        return ""
+    text = (value if isinstance(value, str) else str(value)).strip()
+    return "" if is_blank_tag(text) else text
+
+@dataclass(slots=True)
 class Choices:
     subgroup_column: Optional[str] = None
     show_detailed: bool = False
@@ -35,7 +50,7 @@ class Choices:
         # Создаем директорию если она не существует
         self.output_directory.mkdir(parents=True, exist_ok=True)
 
-@dataclass
+@dataclass(slots=True)
 class Operation:
     name: str
     outputs: List[str] = field(default_factory=list)
@@ -51,13 +66,12 @@ class Operation:
     cycle_period: str = "день"
     personnel_count: int = 1
     personnel_cost_per_hour: float = 0.0
+    # Дополнительные колонки исходной таблицы
+    additional_data: Dict[str, Any] = field(default_factory=dict)
     
     def __post_init__(self):
         """Валидация данных после инициализации"""
         self._validate()
-        # Инициализируем дополнительные данные
-        if not hasattr(self, 'additional_data'):
-            self.additional_data = {}
     
     def _validate(self):
         """Валидация данных операции"""
@@ -69,10 +83,10 @@ class Operation:
         self.outputs = [out.strip() for out in self.outputs if out and str(out).strip()]
         self.inputs = [inp.strip() for inp in self.inputs if inp and str(inp).strip()]
         
-        if self.subgroup:
-            self.subgroup = str(self.subgroup).strip()
-            if self.subgroup.lower() == 'nan':
-                self.subgroup = None
+        # Теги приводятся к чистой строке, пустые значения - к None/""
+        self.subgroup = _clean_tag(self.subgroup) or None
+        self.group = _clean_tag(self.group)
+        self.owner = _clean_tag(self.owner)
         
         # Валидация новых полей
         valid_periods = ["смена", "день", "неделя", "месяц", "квартал", "год"]
@@ -91,6 +105,21 @@ class Operation:
         if self.personnel_cost_per_hour < 0:
             raise ValueError("Стоимость часа работы не может быть отрицательной")
 
+    @property
+    def is_merge(self) -> bool:
+        """Точка слияния: операция с несколькими входами"""
+        return len(self.inputs) > 1
+
+    @property
+    def inputs_csv(self) -> str:
+        """Входы через запятую для реестров ("-" если входов нет)"""
+        return ", ".join(self.inputs) if self.inputs else "-"
+
+    @property
+    def outputs_csv(self) -> str:
+        """Выходы через запятую для реестров ("-" если выходов нет)"""
+        return ", ".join(self.outputs) if self.outputs else "-"
+
     @property
     def total_time_per_period(self) -> float:
         """Общее время операции за период"""
@@ -112,10 +141,10 @@ class Operation:
         self.outputs = [out.strip() for out in self.outputs if out and str(out).strip()]
         self.inputs = [inp.strip() for inp in self.inputs if inp and str(inp).strip()]
         
-        if self.subgroup:
-            self.subgroup = str(self.subgroup).strip()
-            if self.subgroup.lower() == 'nan':
-                self.subgroup = None
+        # Теги приводятся к чистой строке, пустые значения - к None/""
+        self.subgroup = _clean_tag(self.subgroup) or None
+        self.group = _clean_tag(self.group)
+        self.owner = _clean_tag(self.owner)
 
 @dataclass
 class CausalLink:
@@ -149,26 +178,26 @@ class CausalLink:
         self.influence = self.influence.strip()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MergePoint:
     operation: str
     input_count: int
     inputs: List[str]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SplitPoint:
     output: str
     source_operation: str
     target_count: int
     targets: List[str]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CriticalPoint:
     operation: str
     inputs_count: int
     output_reuse: int
 
-@dataclass
+@dataclass(slots=True)
 class ProcessAnalysis:
     merge_points: List[MergePoint]
     split_points: List[SplitPoint]
@@ -179,14 +208,22 @@ class ProcessAnalysis:
     subgroups_count: int
     groups_count: int
     owners_count: int
+    # Распределение операций по тегам (для рейтингов без повторного обхода операций)
+    subgroup_counts: Counter = field(default_factory=Counter)
+    group_counts: Counter = field(default_factory=Counter)
+    owner_counts: Counter = field(default_factory=Counter)
+    # Оценка сложности процесса от 1 до 10 (считается при анализе)
+    complexity_score: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class AnalysisData:
     external_inputs: Set[str]
     final_outputs: Set[str]
     output_to_operation: Dict[str, str]
     input_to_operations: Dict[str, List[str]]
     analysis: ProcessAnalysis
+    # Выходы, используемые более чем одной операцией (точки разветвления)
+    split_outputs: FrozenSet[str] = frozenset()
 
 @dataclass
 class CausalAnalysis:
@@ -3,10 +3,24 @@
 """
 import re
 import pandas as pd
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import List, Set, Tuple, Dict
+from typing import List, Set, Tuple, Dict, Sequence
 from config import ENCODING
 
+def _memoize_str(func):
+    """Кэш результатов только для строковых аргументов: равные значения разных типов
+    (1.0 и True) не делят запись, а нехешируемые значения обрабатываются без кэша"""
+    cached = lru_cache(maxsize=4096)(func)
+
+    @wraps(func)
+    def wrapper(value):
+        return cached(value) if type(value) is str else func(value)
+    return wrapper
+
+# Идентификаторы и экранирование считаются для одних и тех же имен много раз
+# (узлы, связи, подписи), поэтому результаты запоминаются
+@_memoize_str
 def safe_id(name: str | None) -> str:
     if pd.isna(name) or not str(name).strip():
         return "empty"
@@ -16,11 +30,13 @@ def safe_id(name: str | None) -> str:
         safe = "id_" + safe
     return safe or "empty"
 
+@_memoize_str
 def escape_text(text: str | None) -> str:
     if not text:
         return ""
     return str(text).replace('"', '#quot;').replace("(", "#40;").replace(")", "#41;")
 
+@_memoize_str
 def clean_text(text: str | None) -> str:
     if not text:
         return ""
@@ -43,12 +59,16 @@ def merge_strings(existing: str, new: str, separator: str = "; ") -> str:
     merged = set(existing_parts + new_parts)
     return separator.join(sorted(merged))
 
+def casefold_key(text: str) -> Tuple[str, str]:
+    """Ключ сортировки без учета регистра (при совпадении - по исходной строке, порядок однозначен)"""
+    return text.casefold(), text
+
 def get_excel_files() -> List[Path]:
     return list(Path(".").glob("*.xlsx")) + list(Path(".").glob("*.xls"))
 
-def create_markdown_table(headers: List[str], data: List[Dict[str, str]]) -> str:
+def create_markdown_table(headers: List[str], data: List[Sequence]) -> str:
     """
-    Создает Markdown таблицу из данных
+    Создает Markdown таблицу из данных (строки - кортежи в порядке заголовков)
     """
     if not data:
         return "Нет данных для отображения"
@@ -56,6 +76,6 @@ def create_markdown_table(headers: List[str], data: List[Dict[str, str]]) -> str
     table_lines.append("| " + " | ".join(headers) + " |")
     table_lines.append("|" + "|".join(["---"] * len(headers)) + "|")
     for row in data:
-        values = [_escape_multiline(str(row.get(h, ""))) for h in headers]
+        values = [_escape_multiline(str(value)) for value in row]
         table_lines.append("| " + " | ".join(values) + " |")
     return "\n".join(table_lines)
\ No newline at end of file